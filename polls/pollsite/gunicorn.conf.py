@@ -0,0 +1,14 @@
+"""
+gunicorn settings for pollsite:
+
+    gunicorn -c gunicorn.conf.py pollsite.wsgi
+
+The application is loaded, and warmed up (see polls/warmup.py), once in the
+master process; the workers forked from it answer their first request
+without importing or compiling anything.
+"""
+import multiprocessing
+
+bind = '127.0.0.1:8000'
+workers = multiprocessing.cpu_count() * 2 + 1
+preload_app = True
@@ -1,21 +1,121 @@
+from collections import OrderedDict
+from operator import attrgetter
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.forms.models import BaseInlineFormSet
 
+from . import sharding, snapshots
 from .models import Choice, Question
 
 
+class ShardInlineFormSet(BaseInlineFormSet):
+    """
+    Reads the inline objects from the shard of the object they belong to.
+    Saving needs nothing more: ShardRouter sends them to that shard.
+    """
+
+    def __init__(self, data=None, files=None, instance=None,
+                 save_as_new=False, prefix=None, queryset=None, **kwargs):
+        if (instance is not None and instance._state.db is not None and
+                queryset is not None):
+            queryset = queryset.using(instance._state.db)
+        super(ShardInlineFormSet, self).__init__(
+            data, files, instance, save_as_new, prefix, queryset, **kwargs)
+
+
 class ChoiceInline(admin.TabularInline):
     model = Choice
+    formset = ShardInlineFormSet
     extra = 3
 
 
+class MergedQuerySet(object):
+    """
+    The rows a query finds on all the shards, in the order of the query:
+    enough of a queryset for the change list to count and page through.
+    """
+    ordered = True
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.model = queryset.model
+
+    def count(self):
+        return sum(queryset.count()
+                   for queryset in sharding.each_shard(self.queryset))
+
+    def __len__(self):
+        return self.count()
+
+    def _clone(self):
+        return self
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, k):
+        if not isinstance(k, slice):
+            return self[k:k + 1][0]
+        start, stop = k.start or 0, k.stop
+        # Rows past 'stop' on one shard can't come before 'stop' overall.
+        rows = [row for queryset in sharding.each_shard(self.queryset)
+                for row in queryset[:stop]]
+        for field in reversed(self.queryset.query.order_by):
+            rows.sort(key=attrgetter(field.lstrip('-')),
+                      reverse=field.startswith('-'))
+        return rows[start:stop]
+
+
+class ShardedChangeList(ChangeList):
+    """
+    Lists the questions of every shard.
+    """
+
+    def get_queryset(self, request):
+        queryset = super(ShardedChangeList, self).get_queryset(request)
+        self.root_queryset = MergedQuerySet(self.root_queryset)
+        return MergedQuerySet(queryset)
+
+
 class QuestionAdmin(admin.ModelAdmin):
     fieldsets = [
-        (None,              {'fields': ['question_text']}),
+        (None,              {'fields': ['question_text', 'closed']}),
         ('Date information',{'fields': ['pub_date'], 'classes': ['collapse']}),
     ]
     inlines = [ChoiceInline]
-    list_display = ('question_text', 'pub_date', 'was_published_recently')
-    list_filter = ['pub_date']
+    list_display = ('question_text', 'pub_date', 'was_published_recently',
+                    'closed')
+    list_filter = ['pub_date', 'closed']
     search_fields = ['question_text']
 
+    def get_changelist(self, request, **kwargs):
+        if len(sharding.shards()) > 1:
+            return ShardedChangeList
+        return super(QuestionAdmin, self).get_changelist(request, **kwargs)
+
+    def get_actions(self, request):
+        # Actions run on a single database; delete questions of the other
+        # shards from their change page.
+        if len(sharding.shards()) > 1:
+            return OrderedDict()
+        return super(QuestionAdmin, self).get_actions(request)
+
+    def get_object(self, request, object_id, from_field=None):
+        try:
+            using = sharding.shard_for(object_id)
+        except ValueError:
+            return None
+        queryset = self.get_queryset(request).using(using)
+        try:
+            return queryset.get(pk=object_id)
+        except Question.DoesNotExist:
+            return None
+
+    def save_related(self, request, form, formsets, change):
+        super(QuestionAdmin, self).save_related(request, form, formsets, change)
+        # Regenerate (or drop) the static results page once the choices
+        # edited inline are saved too.
+        snapshots.update_snapshot(form.instance)
+
 admin.site.register(Question, QuestionAdmin)
@@ -1,5 +1,11 @@
+from importlib import import_module
+
 from django.apps import AppConfig
 
 
 class PollsConfig(AppConfig):
     name = 'polls'
+
+    def ready(self):
+        # Connects the signal receivers.
+        import_module('polls.signals')
@@ -0,0 +1,87 @@
+"""
+Archival of old questions.
+
+archive() moves the questions published more than POLLS_ARCHIVE_AFTER ago,
+with their choices, from the hot Question and Choice tables into
+ArchivedQuestion and ArchivedChoice, in batches. The public views then scan
+smaller tables and indexes, while the results page of an archived question
+stays available (read only) under its old URL. The vote history of archived
+questions is not kept.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import sharding
+from .models import ArchivedChoice, ArchivedQuestion, Choice, Question
+
+
+def archive_after():
+    """
+    Age after which questions are archived (default 365 days).
+    """
+    return getattr(settings, 'POLLS_ARCHIVE_AFTER',
+                   datetime.timedelta(days=365))
+
+
+def archive(before=None, batch_size=500):
+    """
+    Archive the questions published before 'before' (default: older than
+    archive_after()), 'batch_size' questions per transaction. Return the
+    number of questions archived.
+    """
+    if before is None:
+        before = timezone.now() - archive_after()
+    archived = 0
+    for alias in sharding.shards():
+        while True:
+            ids = list(Question.objects.using(alias).filter(
+                pub_date__lt=before).order_by('pk').values_list(
+                'pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            _archive_batch(alias, ids)
+            archived += len(ids)
+    return archived
+
+
+def _archive_batch(using, ids):
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        ArchivedQuestion.objects.using(using).bulk_create([
+            ArchivedQuestion(pk=question.pk,
+                             question_text=question.question_text,
+                             pub_date=question.pub_date,
+                             closed=question.closed, archived_at=now)
+            for question in Question.objects.using(using).filter(pk__in=ids)])
+        ArchivedChoice.objects.using(using).bulk_create([
+            ArchivedChoice(pk=choice.pk, question_id=choice.question_id,
+                           choice_text=choice.choice_text, votes=choice.votes)
+            for choice in Choice.objects.using(using).filter(
+                question_id__in=ids)])
+        # Also deletes the choices and vote history, and invalidates the
+        # cached questions.
+        Question.objects.using(using).filter(pk__in=ids).delete()
+
+
+def vacuum():
+    """
+    Give the space freed by archiving back to the file system (SQLite
+    only reuses it otherwise).
+    """
+    for alias in sharding.shards():
+        connection = connections[alias]
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+
+
+def get_archived_question(pk):
+    """
+    Return the archived question with the given primary key, with its
+    choices prefetched, or None.
+    """
+    return ArchivedQuestion.objects.using(sharding.shard_for(pk)).filter(
+        pk=pk).prefetch_related('choice_set').first()
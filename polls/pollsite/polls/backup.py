@@ -0,0 +1,170 @@
+"""
+Online backups of the SQLite databases.
+
+Copying db.sqlite3 while vote() writes to it can produce a torn copy, and
+locking the file for the whole copy blocks every vote. backup() uses
+SQLite's online backup API instead: it copies 'pages' pages at a time and
+sleeps in between, so writers only wait for one step at a time.
+
+A write from another connection makes the copy start over. When votes keep
+coming faster than the steps, backup() gives up after 'max_restarts'
+restarts and copies everything in a single step, during which writers wait
+(unless the database uses WAL mode, where they never wait for readers).
+
+Backups can be gzip compressed (paths ending in '.gz'), are checked with
+PRAGMA integrity_check by verify(), and are copied back into a live
+database, also with the backup API, by restore().
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+def _raw_connection(using):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        raise ValueError('Database %r is not an SQLite database.' % using)
+    connection.ensure_connection()
+    return connection.connection
+
+
+@contextmanager
+def _uncompressed(path):
+    """
+    Yield the path of an uncompressed copy of the backup at 'path'.
+    """
+    if not path.endswith('.gz'):
+        yield path
+        return
+    fd, tmp_path = tempfile.mkstemp(suffix='.sqlite3')
+    try:
+        with os.fdopen(fd, 'wb') as f, gzip.open(path, 'rb') as compressed:
+            shutil.copyfileobj(compressed, f)
+        yield tmp_path
+    finally:
+        os.remove(tmp_path)
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def backup(path, using='default', pages=256, sleep=0.01, progress=None,
+           max_restarts=10):
+    """
+    Back the database 'using' up into 'path', 'pages' pages at a time with
+    'sleep' seconds in between, gzip compressing it if 'path' ends in
+    '.gz'. 'progress' is called as progress(status, remaining, total)
+    after every step. Return the number of times the copy started over.
+    """
+    restarts = [0]
+    remaining_before = [None]
+
+    def step(status, remaining, total):
+        if remaining_before[0] is not None and remaining > remaining_before[0]:
+            restarts[0] += 1
+            if restarts[0] > max_restarts:
+                raise _TooManyRestarts
+        remaining_before[0] = remaining
+        if progress is not None:
+            progress(status, remaining, total)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(suffix='.sqlite3', dir=directory)
+    os.close(fd)
+    try:
+        source = _raw_connection(using)
+        target = sqlite3.connect(tmp_path)
+        try:
+            try:
+                source.backup(target, pages=pages, progress=step, sleep=sleep)
+            except _TooManyRestarts:
+                source.backup(target, pages=-1, progress=progress)
+        finally:
+            target.close()
+        if path.endswith('.gz'):
+            with open(tmp_path, 'rb') as f, gzip.open(tmp_path + '.gz',
+                                                      'wb') as compressed:
+                shutil.copyfileobj(f, compressed)
+            os.remove(tmp_path)
+            tmp_path += '.gz'
+        # Never leave a partial backup under the final name.
+        os.replace(tmp_path, path)
+    finally:
+        for leftover in (tmp_path, tmp_path + '.gz'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return restarts[0]
+
+
+def verify(path):
+    """
+    Return the problems PRAGMA integrity_check finds in the backup at
+    'path' (an empty list when the backup is sound).
+    """
+    try:
+        with _uncompressed(path) as db_path:
+            connection = sqlite3.connect(db_path)
+            try:
+                rows = connection.execute('PRAGMA integrity_check').fetchall()
+            finally:
+                connection.close()
+    except (EOFError, OSError, sqlite3.DatabaseError) as e:
+        return [str(e)]
+    return [row[0] for row in rows if row[0] != 'ok']
+
+
+def restore(path, using='default', pages=256, sleep=0.01):
+    """
+    Replace the contents of the database 'using' with the backup at
+    'path'.
+    """
+    with _uncompressed(path) as db_path:
+        source = sqlite3.connect(db_path)
+        try:
+            source.backup(_raw_connection(using), pages=pages, sleep=sleep)
+        finally:
+            source.close()
+
+
+class WriteLatencyProbe(threading.Thread):
+    """
+    Measures how long a small write transaction, like the one of a vote,
+    takes on an SQLite file, e.g. while it is being backed up. Each probe
+    rewrites the (otherwise unused) user_version of the database with its
+    current value, which needs the same locks as any other commit.
+    """
+
+    def __init__(self, db_path, interval=0.005):
+        super(WriteLatencyProbe, self).__init__(daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self.latencies = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        connection = sqlite3.connect(self.db_path, timeout=30,
+                                     isolation_level=None)
+        try:
+            version, = connection.execute('PRAGMA user_version').fetchone()
+            while not self.stopped.is_set():
+                start = time.perf_counter()
+                connection.execute('BEGIN IMMEDIATE')
+                connection.execute('PRAGMA user_version = %d' % version)
+                connection.execute('COMMIT')
+                self.latencies.append(time.perf_counter() - start)
+                time.sleep(self.interval)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return sorted(self.latencies)
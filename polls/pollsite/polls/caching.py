@@ -0,0 +1,47 @@
+"""
+Version numbers of questions, used to build cache keys.
+
+The version of a question changes whenever the question or one of its
+choices is saved or deleted (including votes), so anything cached under a
+key containing it is never served stale and needs no explicit deletion.
+
+Versions are kept in the default cache, which must be shared by every
+process that changes questions or serves them: a version bumped in a cache
+only one process sees leaves the others serving stale data.
+"""
+import uuid
+
+from django.core.cache import cache
+
+
+def _version_key(question_id):
+    return 'polls:question:%s:version' % question_id
+
+
+def _new_version():
+    # A random version rather than an incremented one: incr() is a read
+    # followed by a write in the file based cache, so two processes bumping
+    # the same version at once could both store the same number. A version
+    # evicted from the cache never comes back either.
+    return uuid.uuid4().hex
+
+
+def get_version(question_id):
+    """
+    Return the current version of the given question.
+    """
+    key = _version_key(question_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(question_id):
+    """
+    Give the question a new version, invalidating its cached data.
+    """
+    version = _new_version()
+    cache.set(_version_key(question_id), version, None)
+    return version
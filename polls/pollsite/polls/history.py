@@ -0,0 +1,136 @@
+"""
+Per-choice vote history, bucketed by minute and by hour.
+
+Every vote increments the minute bucket of its choice. Minute buckets older
+than POLLS_VOTE_HISTORY_MINUTE_RETENTION are rolled up into hourly buckets by
+rollup() (see the 'rollup_votes' management command), so the table only grows
+by one row per choice and hour for old history.
+"""
+import datetime
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from . import sharding
+from .models import VoteBucket
+
+
+def minute_retention():
+    """
+    How long minute buckets are kept before being rolled up (default 1 day).
+    """
+    return getattr(settings, 'POLLS_VOTE_HISTORY_MINUTE_RETENTION',
+                   datetime.timedelta(days=1))
+
+
+def hour_retention():
+    """
+    How long hour buckets are kept. None (the default) keeps them forever.
+    """
+    return getattr(settings, 'POLLS_VOTE_HISTORY_HOUR_RETENTION', None)
+
+
+def bucket_start(when, resolution):
+    """
+    Return the start of the bucket with the given 'resolution' that
+    contains 'when'. Buckets are always aligned in UTC.
+    """
+    if timezone.is_aware(when):
+        when = when.astimezone(timezone.utc)
+    when = when.replace(second=0, microsecond=0)
+    if resolution == VoteBucket.HOUR:
+        when = when.replace(minute=0)
+    return when
+
+
+def _increment(question_id, choice_id, resolution, start, votes):
+    """
+    Add 'votes' to a bucket, creating it if needed (upsert-increment).
+    """
+    using = sharding.shard_for(question_id)
+    buckets = VoteBucket.objects.using(using).filter(
+        choice_id=choice_id, resolution=resolution, start=start)
+    if buckets.update(votes=F('votes') + votes):
+        return
+    try:
+        with transaction.atomic(using=using):
+            VoteBucket.objects.using(using).create(
+                question_id=question_id, choice_id=choice_id,
+                resolution=resolution, start=start, votes=votes)
+    except IntegrityError:
+        # A concurrent vote created the bucket after our update.
+        buckets.update(votes=F('votes') + votes)
+
+
+def record_vote(choice, votes=1, when=None):
+    """
+    Record 'votes' votes for 'choice' in the minute bucket of 'when'
+    (default now).
+    """
+    if when is None:
+        when = timezone.now()
+    _increment(choice.question_id, choice.pk, VoteBucket.MINUTE,
+               bucket_start(when, VoteBucket.MINUTE), votes)
+
+
+def rollup(before=None):
+    """
+    Roll minute buckets that start before 'before' into hour buckets and
+    drop hour buckets older than the hour retention. Only whole hours are
+    rolled up. Return the number of minute buckets removed.
+    """
+    if before is None:
+        before = timezone.now() - minute_retention()
+    before = bucket_start(before, VoteBucket.HOUR)
+    removed = 0
+    for alias in sharding.shards():
+        with transaction.atomic(using=alias):
+            minutes = VoteBucket.objects.using(alias).filter(
+                resolution=VoteBucket.MINUTE, start__lt=before)
+            rows = list(minutes.annotate(
+                hour=TruncHour('start', tzinfo=timezone.utc)).values(
+                'question_id', 'choice_id', 'hour').annotate(
+                total=Sum('votes')))
+            for row in rows:
+                _increment(row['question_id'], row['choice_id'],
+                           VoteBucket.HOUR, row['hour'], row['total'])
+            removed += minutes.delete()[0]
+            if hour_retention() is not None:
+                VoteBucket.objects.using(alias).filter(
+                    resolution=VoteBucket.HOUR,
+                    start__lt=timezone.now() - hour_retention()).delete()
+    return removed
+
+
+def time_series(question, resolution=VoteBucket.MINUTE, since=None,
+                until=None):
+    """
+    Return the vote history of 'question' as a list of
+    (bucket start, {choice id: votes}) pairs ordered by time.
+
+    Minute series only cover the minute retention window. Hourly series
+    include both rolled up buckets and the not yet rolled up minutes.
+    """
+    buckets = VoteBucket.objects.using(sharding.shard_for(question.pk)).filter(
+        question=question)
+    if since is not None:
+        buckets = buckets.filter(start__gte=bucket_start(since, resolution))
+    if until is not None:
+        buckets = buckets.filter(start__lt=until)
+
+    rows = list(buckets.filter(resolution=resolution).values_list(
+        'start', 'choice_id', 'votes'))
+    if resolution == VoteBucket.HOUR:
+        rows += buckets.filter(resolution=VoteBucket.MINUTE).annotate(
+            hour=TruncHour('start', tzinfo=timezone.utc)).values_list(
+            'hour', 'choice_id').annotate(total=Sum('votes'))
+
+    series = OrderedDict()
+    for start, choice_id, votes in sorted(rows, key=lambda row: row[0]):
+        counts = series.setdefault(start, {})
+        counts[choice_id] = counts.get(choice_id, 0) + votes
+    return list(series.items())
@@ -0,0 +1,33 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from polls import archive
+
+
+class Command(BaseCommand):
+    help = ('Moves old questions and their choices into the archive tables. '
+            'Their results page stays available.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, metavar='DAYS',
+            help='Archive questions published more than this many days ago '
+                 '(default: POLLS_ARCHIVE_AFTER).')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of questions archived per transaction.')
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Shrink the database files afterwards.')
+
+    def handle(self, *args, **options):
+        before = None
+        if options['older_than'] is not None:
+            before = timezone.now() - datetime.timedelta(
+                days=options['older_than'])
+        archived = archive.archive(before, options['batch_size'])
+        self.stdout.write('Archived %d question(s).' % archived)
+        if options['vacuum']:
+            archive.vacuum()
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from polls import backup
+from polls.management.commands.loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = ('Backs an SQLite database up while the site keeps running, using '
+            "SQLite's online backup API. Paths ending in .gz are gzip "
+            'compressed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to write the backup to.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database to back up (default: "default").')
+        parser.add_argument(
+            '--pages', type=int, default=256,
+            help='Pages copied per step; writers wait for at most one step. '
+                 '-1 copies everything in one step.')
+        parser.add_argument(
+            '--sleep', type=float, default=0.01,
+            help='Seconds to pause between steps.')
+        parser.add_argument(
+            '--max-restarts', type=int, default=10,
+            help='Writes from other connections restart the copy; after this '
+                 'many restarts, copy the rest in one step.')
+        parser.add_argument(
+            '--no-verify', action='store_false', dest='verify',
+            help='Skip the integrity check of the backup.')
+        parser.add_argument(
+            '--measure-latency', action='store_true',
+            help='Measure how long writers wait for the write lock while the '
+                 'backup runs.')
+
+    def handle(self, *args, **options):
+        probe = None
+        if options['measure_latency']:
+            probe = backup.WriteLatencyProbe(
+                connections[options['database']].settings_dict['NAME'])
+            probe.start()
+        start = time.perf_counter()
+        steps = []
+        try:
+            restarts = backup.backup(
+                options['path'], options['database'], options['pages'],
+                options['sleep'], progress=lambda *args: steps.append(args),
+                max_restarts=options['max_restarts'])
+        except ValueError as e:
+            raise CommandError(e)
+        finally:
+            latencies = probe.stop() if probe is not None else None
+        self.stdout.write(
+            'Backed %s up to %s in %.2f s (%d step(s), %d restart(s)).' % (
+                options['database'], options['path'],
+                time.perf_counter() - start, len(steps), restarts))
+        if latencies is not None:
+            self.stdout.write(
+                'Write lock wait over %d probes: p50 %.1f ms, p99 %.1f ms, '
+                'max %.1f ms.' % (
+                    len(latencies), percentile(latencies, 50) * 1000,
+                    percentile(latencies, 99) * 1000,
+                    (latencies[-1] if latencies else 0) * 1000))
+        if options['verify']:
+            problems = backup.verify(options['path'])
+            if problems:
+                raise CommandError('The backup is corrupt:\n%s'
+                                   % '\n'.join(problems))
+            self.stdout.write('Integrity check passed.')
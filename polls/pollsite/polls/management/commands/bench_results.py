@@ -0,0 +1,45 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from polls import results
+
+
+class Command(BaseCommand):
+    help = ('Measures how long computing the results statistics takes for '
+            'polls with many choices, with NumPy (when installed) and with '
+            'the pure Python fallback.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--choices', type=int, nargs='+', default=[10, 100, 1000, 10000],
+            help='Numbers of choices to measure.')
+        parser.add_argument(
+            '--votes', type=int, default=1000000,
+            help='Total number of votes, spread randomly over the choices.')
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Runs per measurement; the fastest one is reported.')
+
+    def handle(self, *args, **options):
+        implementations = [('python', results._compute_python)]
+        if results.numpy is not None:
+            implementations.append(('numpy', results._compute_numpy))
+        else:
+            self.stdout.write('NumPy is not installed.')
+        rng = random.Random(0)
+        for count in options['choices']:
+            weights = [rng.random() for i in range(count)]
+            scale = options['votes'] / sum(weights)
+            votes = [int(weight * scale) for weight in weights]
+            timings = []
+            for name, compute in implementations:
+                best = None
+                for i in range(options['repeat']):
+                    start = time.perf_counter()
+                    compute(votes, results.top_count())
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                timings.append('%s %.3f ms' % (name, best * 1000))
+            self.stdout.write('%6d choices: %s' % (count, ', '.join(timings)))
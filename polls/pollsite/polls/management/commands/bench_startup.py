@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a new process: time until the WSGI application is ready, and the
+# first and second responses.
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from polls import warmup
+loaded = time.perf_counter()
+if sys.argv[2] == 'warm':
+    warmup.warm_up(application)
+ready = time.perf_counter()
+status = warmup.request(application, sys.argv[1])
+first = time.perf_counter()
+warmup.request(application, sys.argv[1])
+second = time.perf_counter()
+print(json.dumps({
+    'status': status,
+    'load': loaded - start,
+    'warmup': ready - loaded,
+    'first': first - ready,
+    'second': second - first,
+    'total': first - start,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Measures the time a new process takes to answer its first '
+            'request, with and without warm-up (see polls/warmup.py).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/polls/',
+                            help='URL of the first requests.')
+        parser.add_argument('--runs', type=int, default=5,
+                            help='Processes started per mode; the median is '
+                                 'reported.')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [settings.BASE_DIR] + [path for path in [env.get('PYTHONPATH')]
+                                   if path])
+        self.stdout.write('%-6s %8s %8s %8s %8s %10s  (ms)' % (
+            'mode', 'load', 'warm-up', 'first', 'second', 'to first'))
+        for mode in ('cold', 'warm'):
+            runs = []
+            for i in range(options['runs']):
+                output = subprocess.run(
+                    [sys.executable, '-c', SCRIPT, options['url'], mode],
+                    env=env, stdout=subprocess.PIPE, check=True).stdout
+                runs.append(json.loads(output.decode().splitlines()[-1]))
+            if any(not run['status'].startswith('200') for run in runs):
+                raise CommandError('%s answered %s.' % (options['url'],
+                                                        runs[0]['status']))
+            median = {key: sorted(run[key] for run in runs)[len(runs) // 2]
+                      for key in ('load', 'warmup', 'first', 'second',
+                                  'total')}
+            self.stdout.write('%-6s %8.1f %8.1f %8.1f %8.1f %10.1f' % (
+                mode, median['load'] * 1000, median['warmup'] * 1000,
+                median['first'] * 1000, median['second'] * 1000,
+                median['total'] * 1000))
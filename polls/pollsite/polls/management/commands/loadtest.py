@@ -0,0 +1,214 @@
+import asyncio
+import random
+import re
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+ENDPOINTS = ('index', 'detail', 'results', 'vote')
+QUESTION_LINK_RE = re.compile(rb'href="\s*/polls/(\d+)/"')
+CSRF_TOKEN_RE = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+CHOICE_RE = re.compile(rb'name="choice" id="[^"]*" value="\s*(\d+)\s*"')
+CSRF_COOKIE_RE = re.compile(r'csrftoken=([^;]+)')
+
+
+def percentile(sorted_values, percent):
+    """
+    Return the nearest-rank 'percent' percentile of a sorted list.
+    """
+    if not sorted_values:
+        return 0
+    rank = max(0, int(round(percent / 100.0 * len(sorted_values))) - 1)
+    return sorted_values[rank]
+
+
+class Response(object):
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class Client(object):
+    """
+    One simulated visitor: a minimal HTTP/1.1 client opening a new
+    connection per request, which keeps its own CSRF cookie and the form
+    token that goes with it.
+    """
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.csrf_cookie = None
+        self.csrf_token = None
+
+    async def request(self, method, path, body=b'', headers=None):
+        headers = dict(headers or {})
+        headers.setdefault('Host', '%s:%s' % (self.host, self.port))
+        headers.setdefault('Connection', 'close')
+        if self.csrf_cookie:
+            headers['Cookie'] = 'csrftoken=%s' % self.csrf_cookie
+        if body:
+            headers['Content-Length'] = str(len(body))
+        head = '%s %s HTTP/1.1\r\n%s\r\n\r\n' % (
+            method, path,
+            '\r\n'.join('%s: %s' % item for item in headers.items()))
+        return await asyncio.wait_for(
+            self._send(head.encode('latin-1') + body), self.timeout)
+
+    async def _send(self, data):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(data)
+            raw = await reader.read()
+        finally:
+            writer.close()
+        head, _, body = raw.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        headers = defaultdict(list)
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()].append(value.strip())
+        for cookie in headers.get('set-cookie', ()):
+            match = CSRF_COOKIE_RE.match(cookie)
+            if match:
+                self.csrf_cookie = match.group(1)
+        return Response(status, headers, body)
+
+
+class Command(BaseCommand):
+    help = ('Drives a mix of index, detail, results and vote requests '
+            'against a running polls server from many concurrent clients, '
+            'and reports throughput, errors and latency per endpoint. '
+            'Votes are rate limited per client address, so raise '
+            'POLLS_VOTE_BURST on the server under test.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/polls/',
+                            help='URL of the polls index page.')
+        parser.add_argument('--clients', type=int, default=50,
+                            help='Number of concurrent clients.')
+        parser.add_argument('--duration', type=float, default=30,
+                            help='Length of the test in seconds.')
+        parser.add_argument(
+            '--mix', default='index=4,detail=3,results=2,vote=1',
+            help='Relative weights of the endpoints.')
+        parser.add_argument(
+            '--questions', type=int, nargs='+',
+            help='Questions to use (default: those on the index page).')
+        parser.add_argument('--timeout', type=float, default=10,
+                            help='Seconds before a request counts as failed.')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Only http:// URLs are supported.')
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.index_path = url.path or '/'
+        self.timeout = options['timeout']
+        try:
+            mix = dict((name, float(weight)) for name, weight in (
+                item.split('=') for item in options['mix'].split(',')))
+        except ValueError:
+            raise CommandError('--mix must look like index=4,vote=1.')
+        unknown = set(mix) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError('Unknown endpoints: %s.' % ', '.join(unknown))
+        self.endpoints = list(mix)
+        self.weights = [mix[name] for name in self.endpoints]
+        # Latencies in seconds and error counts per endpoint.
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        elapsed = asyncio.run(self.run(
+            options['clients'], options['duration'], options['questions']))
+        self.report(elapsed)
+
+    async def run(self, clients, duration, questions):
+        if not questions:
+            response = await Client(self.host, self.port, self.timeout).request(
+                'GET', self.index_path)
+            questions = sorted(set(
+                int(pk) for pk in QUESTION_LINK_RE.findall(response.body)))
+            if not questions:
+                raise CommandError('No questions found on the index page.')
+        self.questions = questions
+        # Choices of each question, learnt from their detail pages.
+        self.choices = {}
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*[
+            self.visitor(Client(self.host, self.port, self.timeout), deadline)
+            for i in range(clients)])
+        return time.perf_counter() - start
+
+    async def visitor(self, client, deadline):
+        while time.perf_counter() < deadline:
+            endpoint = random.choices(self.endpoints, self.weights)[0]
+            question_id = random.choice(self.questions)
+            if endpoint == 'vote' and (client.csrf_token is None or
+                                       question_id not in self.choices):
+                # Load the form first, like a browser would.
+                endpoint = 'detail'
+            await self.call(endpoint, client, question_id)
+
+    async def call(self, endpoint, client, question_id):
+        index = self.index_path.rstrip('/')
+        if endpoint == 'index':
+            args = ('GET', self.index_path)
+            expected = 200
+        elif endpoint == 'detail':
+            args = ('GET', '%s/%d/' % (index, question_id))
+            expected = 200
+        elif endpoint == 'results':
+            args = ('GET', '%s/%d/results/' % (index, question_id))
+            expected = 200
+        else:
+            body = urlencode({'csrfmiddlewaretoken': client.csrf_token,
+                              'choice': random.choice(self.choices[question_id])})
+            args = ('POST', '%s/%d/vote/' % (index, question_id),
+                    body.encode('ascii'),
+                    {'Content-Type': 'application/x-www-form-urlencoded'})
+            expected = 302
+        start = time.perf_counter()
+        try:
+            response = await client.request(*args)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            self.errors[endpoint][type(e).__name__] += 1
+            return
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if response.status != expected:
+            self.errors[endpoint]['HTTP %d' % response.status] += 1
+        elif endpoint == 'detail':
+            token = CSRF_TOKEN_RE.search(response.body)
+            if token:
+                client.csrf_token = token.group(1).decode('ascii')
+            choices = CHOICE_RE.findall(response.body)
+            if choices:
+                self.choices[question_id] = [int(choice) for choice in choices]
+
+    def report(self, elapsed):
+        self.stdout.write('%-8s %8s %8s %8s %8s %8s %8s %8s' % (
+            'endpoint', 'requests', 'req/s', 'errors', 'p50 ms', 'p90 ms',
+            'p99 ms', 'max ms'))
+        for endpoint in ENDPOINTS:
+            latencies = sorted(self.latencies[endpoint])
+            errors = sum(self.errors[endpoint].values())
+            # Requests that never got a response have no latency.
+            total = len(latencies) + sum(
+                count for name, count in self.errors[endpoint].items()
+                if not name.startswith('HTTP'))
+            if not total:
+                continue
+            self.stdout.write('%-8s %8d %8.1f %7.1f%% %8.1f %8.1f %8.1f %8.1f' % (
+                endpoint, total, total / elapsed, 100.0 * errors / total,
+                percentile(latencies, 50) * 1000,
+                percentile(latencies, 90) * 1000,
+                percentile(latencies, 99) * 1000,
+                (latencies[-1] if latencies else 0) * 1000))
+            for name, count in sorted(self.errors[endpoint].items()):
+                self.stdout.write('    %s: %d' % (name, count))
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from polls import profiling
+from polls.models import Question
+
+# The middleware of a new Django project, which pollsite started with.
+STOCK_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+
+class Command(BaseCommand):
+    help = ('Measures the time each middleware takes on the polls pages, for '
+            'anonymous visitors, with the MIDDLEWARE setting and with the '
+            'stock Django middleware.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+        parser.add_argument(
+            '--session-cookie', action='store_true',
+            help='Send a session cookie, as a visitor who logged in would.')
+
+    def handle(self, *args, **options):
+        question = Question.objects.filter(
+            published=True, choice__isnull=False).first()
+        if question is None:
+            raise CommandError('No published question with choices.')
+        urls = [reverse('polls:index'),
+                reverse('polls:detail', args=(question.pk,)),
+                reverse('polls:results', args=(question.pk,))]
+        for name, middleware in (('settings', settings.MIDDLEWARE),
+                                 ('stock', STOCK_MIDDLEWARE)):
+            self.stdout.write('%s MIDDLEWARE (us per request):' % name)
+            timings = self.measure(middleware, urls, options)
+            total = 0
+            for path in middleware:
+                label = 'middleware %s' % path.rsplit('.', 1)[1]
+                spent = sum(timings.get(label, [])) * 1e6 / (
+                    options['iterations'] * len(urls))
+                total += spent
+                self.stdout.write('    %-40s %8.1f' % (label[11:], spent))
+            self.stdout.write('    %-40s %8.1f' % ('total', total))
+
+    def measure(self, middleware, urls, options):
+        classes = [import_string(path) for path in middleware]
+        with override_settings(
+                MIDDLEWARE=middleware,
+                ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver']):
+            client = Client()
+            if options['session_cookie']:
+                client.cookies[settings.SESSION_COOKIE_NAME] = 'x' * 32
+            # Warm up the caches before measuring.
+            for url in urls:
+                client.get(url)
+            with profiling.profile(middleware=classes) as timings:
+                for i in range(options['iterations']):
+                    for url in urls:
+                        client.get(url)
+        return timings
@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import reverse
+
+from polls import profiling, views
+from polls.models import Question
+
+
+class Command(BaseCommand):
+    help = ('Measures the render time of the polls pages, per template and '
+            'block, with cold and with warm fragment caches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument(
+            '--question', type=int,
+            help='Question to render the detail and results pages of '
+                 '(default: the latest published one).')
+
+    def handle(self, *args, **options):
+        question = self.get_question(options['question'])
+        pages = [
+            ('index', views.IndexView.as_view(), reverse('polls:index'), {}),
+            ('detail', views.DetailView.as_view(),
+             reverse('polls:detail', args=(question.pk,)), {'pk': question.pk}),
+            ('results', views.ResultsView.as_view(),
+             reverse('polls:results', args=(question.pk,)), {'pk': question.pk}),
+        ]
+        factory = RequestFactory()
+        iterations = options['iterations']
+        self.stdout.write('%-8s %10s %10s' % ('page', 'cold ms', 'warm ms'))
+        for name, view, url, kwargs in pages:
+            # The page template extends polls/index.html, so its time
+            # covers the whole render.
+            label = 'template %s' % view.view_class.template_name
+            results = []
+            for cold in (True, False):
+                cache.clear()
+                with profiling.profile() as timings:
+                    for i in range(iterations):
+                        if cold:
+                            cache.clear()
+                        view(factory.get(url), **kwargs).render()
+                results.append(timings)
+            self.stdout.write('%-8s %10.3f %10.3f' % (
+                name,
+                self.mean_ms(results[0][label], iterations),
+                self.mean_ms(results[1][label], iterations),
+            ))
+            if options['verbosity'] > 1:
+                for label in sorted(results[0]):
+                    self.stdout.write('    %-36s %10.3f %10.3f' % (
+                        label,
+                        self.mean_ms(results[0][label], iterations),
+                        self.mean_ms(results[1].get(label, []), iterations),
+                    ))
+
+    def get_question(self, pk):
+        questions = Question.objects.filter(choice__isnull=False).distinct()
+        try:
+            if pk is not None:
+                return questions.get(pk=pk)
+            return questions.latest('pub_date')
+        except Question.DoesNotExist:
+            raise CommandError('No question with choices to render.')
+
+    def mean_ms(self, times, iterations):
+        return sum(times) * 1000 / iterations
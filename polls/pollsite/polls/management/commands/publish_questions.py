@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from polls import publishing
+
+
+class Command(BaseCommand):
+    help = ('Publishes the questions whose pub_date has passed. Run it from '
+            'cron, or keep it running with --loop to publish each question '
+            'as soon as it is due.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running, sleeping until the next publication.')
+        parser.add_argument(
+            '--max-sleep', type=float, default=60,
+            help='In --loop mode, check at least this often (seconds) for '
+                 'newly scheduled questions.')
+
+    def handle(self, *args, **options):
+        while True:
+            ids = publishing.publish_due()
+            if ids or options['verbosity'] > 1:
+                self.stdout.write('Published %d question(s).' % len(ids))
+            if not options['loop']:
+                return
+            sleep = options['max_sleep']
+            next_publication = publishing.next_publication()
+            if next_publication is not None:
+                sleep = min(sleep, max(0, (
+                    next_publication - timezone.now()).total_seconds()))
+            time.sleep(sleep)
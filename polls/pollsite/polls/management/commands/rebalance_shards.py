@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+
+from polls import caching, sharding, snapshots
+from polls.models import (ArchivedChoice, ArchivedQuestion, Choice, Question,
+                          VoteBucket)
+
+
+class Command(BaseCommand):
+    help = ('Moves every question, with its choices and vote history, and '
+            'every archived question, with its choices, to the shard it '
+            'belongs to under the current POLLS_SHARDS. Run it after adding '
+            'or removing shards, with the vote queue drained: moved choices '
+            'get new ids.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of questions read from a database at once.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        moved = 0
+        for model, move in ((Question, self.move),
+                            (ArchivedQuestion, self.move_archived)):
+            # Questions may still be on a database dropped from POLLS_SHARDS.
+            for source in settings.DATABASES:
+                if not router.allow_migrate_model(source, model):
+                    continue
+                last_pk = 0
+                while True:
+                    questions = list(model.objects.using(source).filter(
+                        pk__gt=last_pk).order_by('pk')[:options['batch_size']])
+                    if not questions:
+                        break
+                    last_pk = questions[-1].pk
+                    for question in questions:
+                        if sharding.shard_for(question.pk) != source:
+                            move(question, source)
+                            moved += 1
+        sharding.reserve_question_ids()
+        self.stdout.write('Moved %d question(s).' % moved)
+
+    def move(self, question, source):
+        target = sharding.shard_for(question.pk)
+        choices = list(Choice.objects.using(source).filter(question=question))
+        buckets = list(VoteBucket.objects.using(source).filter(
+            question=question))
+        with transaction.atomic(using=target):
+            Question.objects.using(target).bulk_create([question])
+            # Choices and buckets are numbered by each shard, so they get
+            # new ids in the target.
+            choice_ids = {}
+            for choice in choices:
+                old_pk = choice.pk
+                choice.pk = None
+                choice.save(using=target)
+                choice_ids[old_pk] = choice.pk
+            for bucket in buckets:
+                bucket.pk = None
+                bucket.choice_id = choice_ids[bucket.choice_id]
+            VoteBucket.objects.using(target).bulk_create(buckets)
+        Question.objects.using(source).filter(pk=question.pk).delete()
+        caching.bump_version(question.pk)
+        # Deleting the old row removed the snapshot.
+        snapshots.update_snapshot(question)
+        if self.verbosity > 1:
+            self.stdout.write('Moved question %d from %s to %s.'
+                              % (question.pk, source, target))
+
+    def move_archived(self, question, source):
+        target = sharding.shard_for(question.pk)
+        choices = list(ArchivedChoice.objects.using(source).filter(
+            question=question))
+        for choice in choices:
+            # Numbered by each shard, like the choices.
+            choice.pk = None
+        with transaction.atomic(using=target):
+            ArchivedQuestion.objects.using(target).bulk_create([question])
+            ArchivedChoice.objects.using(target).bulk_create(choices)
+        ArchivedQuestion.objects.using(source).filter(pk=question.pk).delete()
+        if self.verbosity > 1:
+            self.stdout.write('Moved archived question %d from %s to %s.'
+                              % (question.pk, source, target))
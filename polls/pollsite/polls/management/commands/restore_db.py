@@ -0,0 +1,46 @@
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from polls import backup
+
+
+class Command(BaseCommand):
+    help = ('Replaces the contents of an SQLite database with a backup made '
+            'by backup_db, after checking its integrity, and clears the '
+            'default cache so that every process reloads the restored '
+            'polls. If that cache is not shared between processes '
+            '(LocMemCache), restart the web workers afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Backup to restore.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database to restore into (default: "default").')
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help='Only check the integrity of the backup.')
+
+    def handle(self, *args, **options):
+        problems = backup.verify(options['path'])
+        if problems:
+            raise CommandError('The backup is corrupt:\n%s'
+                               % '\n'.join(problems))
+        self.stdout.write('Integrity check passed.')
+        if options['verify_only']:
+            return
+        try:
+            backup.restore(options['path'], options['database'])
+        except ValueError as e:
+            raise CommandError(e)
+        # Cached questions, versions and results describe the replaced
+        # contents. Clearing the shared cache makes every process reload
+        # them.
+        cache.clear()
+        self.stdout.write('Restored %s from %s.' % (options['database'],
+                                                   options['path']))
+        if isinstance(caches['default'], LocMemCache):
+            self.stderr.write(
+                'The default cache is private to each process: restart the '
+                'web workers, which still serve the replaced contents.')
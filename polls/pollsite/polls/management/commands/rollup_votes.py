@@ -0,0 +1,24 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from polls import history
+
+
+class Command(BaseCommand):
+    help = 'Rolls old minute vote buckets up into hourly buckets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, metavar='MINUTES',
+            help='Roll up minute buckets older than this many minutes '
+                 '(default: POLLS_VOTE_HISTORY_MINUTE_RETENTION).')
+
+    def handle(self, *args, **options):
+        before = None
+        if options['older_than'] is not None:
+            before = timezone.now() - datetime.timedelta(
+                minutes=options['older_than'])
+        removed = history.rollup(before)
+        self.stdout.write('Rolled up %d minute bucket(s).' % removed)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from polls import sharding, snapshots
+from polls.models import Question
+
+
+class Command(BaseCommand):
+    help = ('Renders the results page of closed, published polls into '
+            'static files under POLLS_SNAPSHOT_ROOT.')
+
+    def handle(self, *args, **options):
+        count = 0
+        for questions in sharding.each_shard(
+                Question.objects.filter(closed=True).prefetch_related(
+                    'choice_set')):
+            for question in questions:
+                if not snapshots.is_public(question):
+                    # Not published yet, or without choices.
+                    snapshots.remove_snapshot(question.id)
+                    continue
+                path = snapshots.write_snapshot(question)
+                if options['verbosity'] > 1:
+                    self.stdout.write(path)
+                count += 1
+        self.stdout.write('Wrote %d snapshot(s).' % count)
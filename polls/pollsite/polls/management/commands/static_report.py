@@ -0,0 +1,99 @@
+import posixpath
+import re
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.urls import reverse
+
+from polls import views
+from polls.models import Question
+from polls.storage import brotli, gzip_compress
+
+ASSET_RE = re.compile(
+    r'<(?:link[^>]+href|script[^>]+src|img[^>]+src)="\s*([^"]+)"')
+CSS_URL_RE = re.compile(r'url\(\s*["\']?([^"\')]+)["\']?\s*\)')
+
+
+class Command(BaseCommand):
+    help = ('Lists the requests and bytes needed to load each polls page, '
+            'HTML included.')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        pages = [('index', views.IndexView.as_view(),
+                  reverse('polls:index'), {})]
+        question = Question.objects.filter(choice__isnull=False).first()
+        if question is not None:
+            for name, view in (('detail', views.DetailView),
+                               ('results', views.ResultsView)):
+                pages.append((name, view.as_view(),
+                              reverse('polls:' + name, args=(question.pk,)),
+                              {'pk': question.pk}))
+
+        self.stdout.write('%-8s %8s %8s %10s %10s %10s' % (
+            'page', 'requests', 'hosts', 'bytes', 'gzip', 'brotli'))
+        for name, view, url, kwargs in pages:
+            response = view(factory.get(url), **kwargs)
+            response.render()
+            html = response.content
+            assets = [('(page)', html)]
+            external = set()
+            self.collect(html.decode('utf-8'), url, assets, external)
+            sizes = [0, 0, 0]
+            for asset_url, content in assets:
+                # Images and other files that do not shrink are served
+                # uncompressed.
+                compressed = [len(content), len(gzip_compress(content)),
+                              len(brotli.compress(content)) if brotli else 0]
+                compressed = [min(size, len(content)) for size in compressed]
+                sizes = [a + b for a, b in zip(sizes, compressed)]
+                if options['verbosity'] > 1:
+                    self.stdout.write('    %-50s %10d %10d %10d' % (
+                        asset_url, *compressed))
+            for asset_url in sorted(external):
+                if options['verbosity'] > 1:
+                    self.stdout.write('    %-50s %10s' % (asset_url, '?'))
+            self.stdout.write('%-8s %8d %8d %10d %10d %10s' % (
+                name, len(assets) + len(external),
+                1 + len({urlsplit(u).netloc for u in external}),
+                sizes[0], sizes[1], sizes[2] if brotli else '-'))
+
+    def collect(self, text, base_url, assets, external, pattern=ASSET_RE):
+        """
+        Add the static files referenced by 'text' (and, for stylesheets,
+        by the stylesheets themselves) to 'assets', other URLs to
+        'external'.
+        """
+        for reference in pattern.findall(text):
+            url = urljoin(base_url, reference.strip())
+            if urlsplit(url).netloc:
+                external.add(url)
+                continue
+            if any(url == seen for seen, content in assets):
+                continue
+            content = self.read_static(url)
+            if content is None:
+                continue
+            assets.append((url, content))
+            if url.endswith('.css'):
+                self.collect(content.decode('utf-8'), url, assets, external,
+                             CSS_URL_RE)
+
+    def read_static(self, url):
+        path = urlsplit(url).path
+        if not path.startswith(settings.STATIC_URL):
+            return None
+        path = posixpath.normpath(path[len(settings.STATIC_URL):])
+        if staticfiles_storage.exists(path):
+            # Collected (and possibly fingerprinted) files.
+            with staticfiles_storage.open(path) as f:
+                return f.read()
+        absolute_path = finders.find(path)
+        if absolute_path is None:
+            return None
+        with open(absolute_path, 'rb') as f:
+            return f.read()
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from polls import votequeue
+
+
+class Command(BaseCommand):
+    help = ('Applies the votes queued by vote() when POLLS_ASYNC_VOTES is on. '
+            'Runs until interrupted unless --once is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Maximum number of votes applied at once.')
+        parser.add_argument('--interval', type=float, default=0.5,
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty.')
+        parser.add_argument('--stats', action='store_true',
+                            help='Only print the queue length and lag.')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.write_lag()
+            return
+        while True:
+            applied = votequeue.process_batch(options['batch_size'])
+            if applied and options['verbosity'] > 1:
+                self.stdout.write('Applied %d vote(s).' % applied)
+                self.write_lag()
+            if not applied and not votequeue.lag()[0]:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+
+    def write_lag(self):
+        pending, lag = votequeue.lag()
+        self.stdout.write('%d vote(s) pending, oldest %.1f s old.'
+                          % (pending, lag))
@@ -0,0 +1,71 @@
+"""
+Leaner versions of the session, authentication and message middleware.
+
+Most requests are anonymous visitors reading polls: GET or HEAD requests
+under one of the POLLS_LEAN_PATHS, without a session cookie. They have no
+session to load, are never logged in and have no messages waiting, so the
+middleware below skip that work for them:
+
+- LeanSessionMiddleware gives them a session that is only created if a view
+  uses it, and only saved (and the cookie only set) if a view modifies it.
+- LeanAuthenticationMiddleware makes request.user an AnonymousUser directly
+  instead of looking the user up in the session.
+- LeanMessageMiddleware sets up no message storage; the messages context
+  processor then finds no messages.
+
+Every other request goes through the stock middleware. Views under the lean
+paths must not add messages when answering a GET.
+"""
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.utils.functional import SimpleLazyObject, empty
+
+
+def is_anonymous_read(request):
+    """
+    Tell whether 'request' reads a public page without a session.
+    """
+    try:
+        return request._polls_anonymous_read
+    except AttributeError:
+        request._polls_anonymous_read = result = (
+            request.method in ('GET', 'HEAD') and
+            settings.SESSION_COOKIE_NAME not in request.COOKIES and
+            request.path_info.startswith(
+                tuple(getattr(settings, 'POLLS_LEAN_PATHS', ['/polls/']))))
+        return result
+
+
+class LeanSessionMiddleware(SessionMiddleware):
+    def process_request(self, request):
+        if is_anonymous_read(request):
+            # Creating a session store isn't free either, so only create
+            # one if a view uses it.
+            request.session = SimpleLazyObject(self.SessionStore)
+        else:
+            super(LeanSessionMiddleware, self).process_request(request)
+
+    def process_response(self, request, response):
+        if (is_anonymous_read(request) and
+                getattr(request, 'session', None) is not None and
+                request.session._wrapped is empty):
+            return response
+        return super(LeanSessionMiddleware, self).process_response(
+            request, response)
+
+
+class LeanAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        if is_anonymous_read(request):
+            request.user = AnonymousUser()
+        else:
+            super(LeanAuthenticationMiddleware, self).process_request(request)
+
+
+class LeanMessageMiddleware(MessageMiddleware):
+    def process_request(self, request):
+        if not is_anonymous_read(request):
+            super(LeanMessageMiddleware, self).process_request(request)
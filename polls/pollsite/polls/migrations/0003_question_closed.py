@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.20 on 2026-10-19 17:41
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0002_vote_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='closed',
+            field=models.BooleanField(default=False),
+        ),
+    ]
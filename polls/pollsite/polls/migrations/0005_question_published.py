@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.20 on 2026-10-19 17:55
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def publish_past_questions(apps, schema_editor):
+    Question = apps.get_model('polls', 'Question')
+    Question.objects.filter(pub_date__lte=timezone.now()).update(published=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_vote_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='published',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterIndexTogether(
+            name='question',
+            index_together=set([('published', 'pub_date')]),
+        ),
+        migrations.RunPython(publish_past_questions,
+                             migrations.RunPython.noop,
+                             hints={'model_name': 'question'}),
+    ]
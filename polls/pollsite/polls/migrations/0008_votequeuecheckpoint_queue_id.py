@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.20 on 2026-10-20 09:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='votequeuecheckpoint',
+            name='queue_id',
+            field=models.CharField(default='', max_length=32),
+        ),
+    ]
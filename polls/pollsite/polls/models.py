@@ -3,11 +3,36 @@ import datetime
 from django.db import models
 from django.utils import timezone
 
+from . import caching, sharding
+
 class Question(models.Model):
     question_text = models.CharField(max_length=200)
     pub_date = models.DateTimeField('date published')
+    closed = models.BooleanField(default=False)
+    # Set once pub_date has passed, on save or by the 'publish_questions'
+    # command, so that the public views need not compare with the time.
+    published = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        index_together = ('published', 'pub_date')
+
     def __str__(self):
         return self.question_text
+    def save(self, *args, **kwargs):
+        if self.pk is None:
+            self.pk = sharding.allocate_question_id()
+            if self.pk is not None:
+                # Also when created through a manager of another database.
+                kwargs['using'] = sharding.shard_for(self.pk)
+        self.published = self.pub_date <= timezone.now()
+        super(Question, self).save(*args, **kwargs)
+    @property
+    def version(self):
+        """
+        Changes whenever the question or its choices change; used in
+        cache keys (see polls/caching.py).
+        """
+        return caching.get_version(self.id)
     def was_published_recently(self):
         now = timezone.now()
         return now - datetime.timedelta(days=1) <= self.pub_date <= now
@@ -21,3 +46,75 @@ class Choice(models.Model):
     votes = models.IntegerField(default=0)
     def __str__(self):
         return self.choice_text
+
+class VoteBucket(models.Model):
+    """
+    Number of votes a choice received within one time bucket. Recent votes
+    are kept per minute; older minute buckets are rolled up into hourly ones
+    by the 'rollup_votes' management command.
+    """
+    MINUTE = 'm'
+    HOUR = 'h'
+    RESOLUTION_CHOICES = (
+        (MINUTE, 'Minute'),
+        (HOUR, 'Hour'),
+    )
+
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    resolution = models.CharField(max_length=1, choices=RESOLUTION_CHOICES)
+    start = models.DateTimeField('bucket start')
+    votes = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('choice', 'resolution', 'start')
+        index_together = ('question', 'resolution', 'start')
+
+    def __str__(self):
+        return '%s @ %s' % (self.choice, self.start)
+
+class VoteQueueCheckpoint(models.Model):
+    """
+    Id of the last queued vote applied to the choices by the vote worker.
+    Saved in the same transaction as the votes, so a batch that was applied
+    but not yet removed from the queue is skipped the next time. Ids start
+    over in a new queue file, so 'last_id' only holds for the queue
+    'queue_id'.
+    """
+    last_id = models.BigIntegerField(default=0)
+    queue_id = models.CharField(max_length=32, default='')
+
+class QuestionId(models.Model):
+    """
+    Allocates the ids of new questions when they are spread over several
+    databases (see polls/sharding.py), so that no two shards use the same
+    id. Only ever stored in the default database.
+    """
+
+class ArchivedQuestion(models.Model):
+    """
+    A question moved out of the hot tables by the 'archive_questions'
+    command, with its original id. Archived questions are read only; only
+    their results page is still shown.
+    """
+    archived = True
+
+    question_text = models.CharField(max_length=200)
+    pub_date = models.DateTimeField('date published')
+    closed = models.BooleanField(default=False)
+    archived_at = models.DateTimeField('date archived', default=timezone.now)
+
+    def __str__(self):
+        return self.question_text
+    @property
+    def version(self):
+        # Archived questions never change.
+        return 'archived'
+
+class ArchivedChoice(models.Model):
+    question = models.ForeignKey(ArchivedQuestion, on_delete=models.CASCADE,
+                                 related_name='choice_set')
+    choice_text = models.CharField(max_length=200)
+    votes = models.IntegerField(default=0)
+    def __str__(self):
+        return self.choice_text
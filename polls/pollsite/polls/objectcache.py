@@ -0,0 +1,132 @@
+"""
+Two-tier read-through cache of questions and their choices by primary key.
+
+Lookups first try a small per-process LRU, then the shared cache, then the
+database. Keys contain the question version (see polls/caching.py), which
+every process reads from the shared cache, so a save, delete or vote in any
+process makes every process miss and reload the question; the only cost of
+a hit is reading the version. This needs a default cache shared by all the
+processes (see CACHES): with a per-process one, changes made by other
+processes (the vote worker, other web workers) are never seen.
+
+Entries also expire from the LRU after POLLS_OBJECT_CACHE_LOCAL_TIMEOUT
+seconds, so that a process never holds on to a question copy for long.
+
+Cached questions are shared between requests and must not be modified.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import archive, caching, sharding
+from .models import Question
+
+
+class LRUCache(object):
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_local = LRUCache(getattr(settings, 'POLLS_OBJECT_CACHE_SIZE', 1000),
+                  getattr(settings, 'POLLS_OBJECT_CACHE_LOCAL_TIMEOUT', 5))
+_stats = Counter()
+
+
+def get_question(pk):
+    """
+    Return the question with the given primary key, with its choices
+    prefetched (question.choice_set.all() runs no query), or None.
+    """
+    pk = int(pk)
+    key = 'polls:question:%d:%s' % (pk, caching.get_version(pk))
+    question = _local.get(key)
+    if question is not None:
+        _stats['local_hits'] += 1
+        return question
+    question = cache.get(key)
+    if question is not None:
+        _stats['shared_hits'] += 1
+    else:
+        _stats['misses'] += 1
+        question = Question.objects.using(sharding.shard_for(pk)).filter(
+            pk=pk).prefetch_related('choice_set').first()
+        if question is None:
+            return None
+        cache.set(key, question,
+                  getattr(settings, 'POLLS_OBJECT_CACHE_TIMEOUT', 300))
+    _local.set(key, question)
+    return question
+
+
+def get_archived_question(pk):
+    """
+    Return the archived question with the given primary key, with its
+    choices prefetched, or None. Archived questions never change, so they
+    are cached without a version.
+    """
+    pk = int(pk)
+    key = 'polls:archived:%d' % pk
+    question = _local.get(key)
+    if question is not None:
+        _stats['local_hits'] += 1
+        return question
+    question = cache.get(key)
+    if question is not None:
+        _stats['shared_hits'] += 1
+    else:
+        _stats['misses'] += 1
+        question = archive.get_archived_question(pk)
+        if question is None:
+            return None
+        cache.set(key, question,
+                  getattr(settings, 'POLLS_OBJECT_CACHE_TIMEOUT', 300))
+    _local.set(key, question)
+    return question
+
+
+def stats():
+    """
+    Return the hit and miss counts of this process, and its hit rate.
+    """
+    result = dict(local_hits=_stats['local_hits'],
+                  shared_hits=_stats['shared_hits'], misses=_stats['misses'])
+    total = sum(result.values())
+    result['hit_rate'] = (total - result['misses']) / total if total else 0.0
+    return result
+
+
+def clear():
+    """
+    Empty the local tier and reset the statistics of this process.
+    """
+    _local.clear()
+    _stats.clear()
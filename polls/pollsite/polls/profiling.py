@@ -0,0 +1,135 @@
+"""
+Time instrumentation for templates, template blocks and middleware.
+
+Inside a profile() block every template render and every {% block %} render
+on the current thread is timed. Times are inclusive: a parent template's
+time contains the time of its blocks and of the templates it includes.
+
+    with profile() as timings:
+        response.render()
+    timings['template polls/index.html']  # list of seconds
+
+profile(middleware=[...]) also times the process_request(), process_view()
+and process_response() hooks of the given middleware classes, under
+'middleware <class name>' labels.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.template.base import Template
+from django.template.loader_tags import BlockNode
+
+_local = threading.local()
+
+
+def _timed(label_func, render):
+    def timed_render(self, *args):
+        timings = getattr(_local, 'timings', None)
+        if timings is None:
+            return render(self, *args)
+        start = time.perf_counter()
+        try:
+            return render(self, *args)
+        finally:
+            timings[label_func(self)].append(time.perf_counter() - start)
+    timed_render.profiled = True
+    return timed_render
+
+
+def _install():
+    # The test runner swaps Template._render for its own instrumented
+    # version, so check for our wrapper each time instead of once.
+    if not getattr(Template._render, 'profiled', False):
+        Template._render = _timed(
+            lambda template: 'template %s' % template.name, Template._render)
+    if not getattr(BlockNode.render, 'profiled', False):
+        BlockNode.render = _timed(
+            lambda block: 'block %s' % block.name, BlockNode.render)
+
+
+def _timed_hook(label, hook):
+    def timed_hook(self, *args):
+        timings = getattr(_local, 'timings', None)
+        running = getattr(_local, 'running_hooks', None)
+        if timings is None or (running and id(self) in running):
+            # A hook calling the wrapped hook of a base class through
+            # super() is timed once, under the label of its own class.
+            return hook(self, *args)
+        _local.running_hooks = running = running or set()
+        running.add(id(self))
+        start = time.perf_counter()
+        try:
+            return hook(self, *args)
+        finally:
+            timings[label].append(time.perf_counter() - start)
+            running.discard(id(self))
+    timed_hook.profiled = True
+    return timed_hook
+
+
+def _install_middleware(middleware):
+    """
+    Wrap the hooks of the 'middleware' classes and return what to restore
+    afterwards, as (class, hook, original) tuples where 'original' is None
+    for inherited hooks.
+    """
+    installed = []
+    for cls in middleware:
+        label = 'middleware %s' % cls.__name__
+        for hook in ('process_request', 'process_view', 'process_response'):
+            method = getattr(cls, hook, None)
+            own = cls.__dict__.get(hook)
+            # Wrap inherited hooks on the class itself too, so that they
+            # are counted under its own name.
+            if method is not None and not getattr(own, 'profiled', False):
+                setattr(cls, hook, _timed_hook(label, method))
+                installed.append((cls, hook, own))
+    return installed
+
+
+def _uninstall_middleware(installed):
+    for cls, hook, original in reversed(installed):
+        if original is None:
+            delattr(cls, hook)
+        else:
+            setattr(cls, hook, original)
+
+
+@contextmanager
+def profile(middleware=()):
+    """
+    Collect render times of the current thread into a dict mapping
+    'template <name>' and 'block <name>' labels to lists of seconds, and
+    hook times of the 'middleware' classes under 'middleware <name>'. The
+    middleware classes are restored on exit.
+    """
+    _install()
+    installed = _install_middleware(middleware)
+    previous = getattr(_local, 'timings', None)
+    _local.timings = timings = defaultdict(list)
+    try:
+        yield timings
+    finally:
+        _local.timings = previous
+        _uninstall_middleware(installed)
+
+
+class TemplateProfilingMiddleware(object):
+    """
+    Report the render time of every template and block of a response in a
+    Server-Timing header, which browsers show in their developer tools.
+    Meant for development; add it to MIDDLEWARE when needed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profile() as timings:
+            response = self.get_response(request)
+        response['Server-Timing'] = ', '.join(
+            'tpl%d;desc="%s";dur=%.3f' % (i, label, sum(times) * 1000)
+            for i, (label, times) in enumerate(sorted(timings.items())))
+        return response
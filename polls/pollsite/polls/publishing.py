@@ -0,0 +1,45 @@
+"""
+Publishing of questions whose pub_date has passed.
+
+Question.save() sets 'published' for questions dated in the past, so only
+questions scheduled for the future need publishing later, by calling
+publish_due() from the 'publish_questions' command. That command runs as a
+process of its own; the versions it bumps reach the web processes through
+the shared default cache, so they stop serving the cached, unpublished
+question at once.
+"""
+from django.utils import timezone
+
+from . import caching, sharding
+from .models import Question
+
+
+def publish_due(now=None):
+    """
+    Publish the questions whose pub_date has passed and return their ids.
+    """
+    if now is None:
+        now = timezone.now()
+    ids = []
+    for due in sharding.each_shard(
+            Question.objects.filter(published=False, pub_date__lte=now)):
+        shard_ids = list(due.values_list('pk', flat=True))
+        if shard_ids:
+            due.filter(pk__in=shard_ids).update(published=True)
+            ids.extend(shard_ids)
+    # update() sends no post_save signal.
+    for pk in ids:
+        caching.bump_version(pk)
+    return sorted(ids)
+
+
+def next_publication():
+    """
+    Return the pub_date of the next question to publish, or None.
+    """
+    dates = [question.pub_date for question in (
+        queryset.order_by('pub_date').only('pub_date').first()
+        for queryset in sharding.each_shard(
+            Question.objects.filter(published=False)))
+        if question is not None]
+    return min(dates) if dates else None
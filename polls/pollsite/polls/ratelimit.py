@@ -0,0 +1,139 @@
+"""
+Token bucket rate limiting for the vote view.
+
+Each client gets one bucket per question holding up to POLLS_VOTE_BURST
+tokens and refilled at POLLS_VOTE_RATE tokens per second. Every vote costs
+one token; votes arriving at an empty bucket are rejected with a 429 before
+the view (and therefore the database) is touched.
+
+Clients are identified by the request.META key named in
+POLLS_RATELIMIT_CLIENT_KEY (REMOTE_ADDR by default, or e.g. HTTP_X_REAL_IP
+behind a trusted proxy). Session cookies are chosen by the client, so they
+are not used: a script could simply drop them to get a fresh bucket.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+
+class TokenBucket(object):
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens
+        self.updated = updated
+
+    def consume(self, rate, burst, now):
+        """
+        Refill the bucket up to 'now' and take one token from it. Return
+        the number of seconds to wait before a token is available, 0 if
+        a token was taken.
+        """
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / rate
+
+
+class LocalBackend(object):
+    """
+    Keeps buckets in process memory. Only the POLLS_RATELIMIT_MAX_KEYS most
+    recently used buckets are kept; idle ones are evicted first.
+    """
+
+    def __init__(self):
+        self.max_keys = getattr(settings, 'POLLS_RATELIMIT_MAX_KEYS', 10000)
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, rate, burst, now):
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TokenBucket(burst, now)
+                if len(self.buckets) > self.max_keys:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+            return bucket.consume(rate, burst, now)
+
+
+class CacheBackend(object):
+    """
+    Keeps buckets in the POLLS_RATELIMIT_CACHE cache so that all worker
+    processes share them. Use a file based or memcached cache for
+    multi-process deployments; a database cache would defeat the purpose.
+    Updates are not atomic, so concurrent votes from one client may
+    occasionally both get the last token.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'POLLS_RATELIMIT_CACHE',
+                                    'default')]
+
+    def consume(self, key, rate, burst, now):
+        key = 'polls:ratelimit:%s' % key
+        state = self.cache.get(key)
+        bucket = TokenBucket(*state) if state else TokenBucket(burst, now)
+        wait = bucket.consume(rate, burst, now)
+        # A bucket that has been idle long enough to refill is the same as
+        # a missing one, so let the cache expire it.
+        self.cache.set(key, (bucket.tokens, bucket.updated),
+                       int(burst / rate) + 1)
+        return wait
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(getattr(
+            settings, 'POLLS_RATELIMIT_BACKEND',
+            'polls.ratelimit.LocalBackend'))()
+    return _backend
+
+
+@receiver(setting_changed)
+def reset(**kwargs):
+    """
+    Drop the backend (and with a local backend every bucket) so it is
+    rebuilt from the current settings.
+    """
+    global _backend
+    _backend = None
+
+
+def limit_votes(view):
+    """
+    Rate limit a view taking a 'question_id' argument per client and
+    question.
+    """
+    @wraps(view)
+    def wrapper(request, question_id, *args, **kwargs):
+        client = request.META.get(
+            getattr(settings, 'POLLS_RATELIMIT_CLIENT_KEY', 'REMOTE_ADDR'),
+            '')
+        wait = get_backend().consume(
+            '%s:%s' % (client, question_id),
+            getattr(settings, 'POLLS_VOTE_RATE', 1.0),
+            getattr(settings, 'POLLS_VOTE_BURST', 10),
+            time.time())
+        if wait:
+            response = HttpResponse('Too many votes, try again later.',
+                                    content_type='text/plain', status=429)
+            response['Retry-After'] = int(wait) + 1
+            return response
+        return view(request, question_id, *args, **kwargs)
+    return wrapper
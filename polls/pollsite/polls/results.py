@@ -0,0 +1,137 @@
+"""
+Statistics of the results of a question.
+
+For every choice: its share of the votes, its rank (choices with the same
+number of votes share a rank) and a 95% confidence interval of its share
+(Wilson score interval, which stays within 0-100% even for choices with
+few or no votes), plus the ids of the POLLS_RESULTS_TOP leading choices.
+
+compute() works on the whole vote array at once with NumPy when it is
+installed and falls back to plain Python otherwise; both give the same
+results. question_results() caches them under the question version, so
+they are computed once per vote rather than once per page view.
+"""
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Two-sided 95% quantile of the normal distribution.
+Z = 1.959963984540054
+
+# Below this many choices, converting to and from arrays costs more than
+# NumPy saves (see the 'bench_results' command).
+NUMPY_MIN_CHOICES = 50
+
+
+def top_count():
+    """
+    Number of leading choices listed (default 10).
+    """
+    return getattr(settings, 'POLLS_RESULTS_TOP', 10)
+
+
+def _compute_numpy(votes, top):
+    votes = numpy.asarray(votes, dtype=numpy.float64)
+    total = votes.sum()
+    # One stable sort gives both the leaders and the ranks.
+    order = numpy.argsort(-votes, kind='stable')
+    ranks = numpy.searchsorted(-votes[order], -votes, side='left') + 1
+    if total:
+        share = votes / total
+        z2 = Z * Z / total
+        center = (share + z2 / 2) / (1 + z2)
+        half = Z * numpy.sqrt(
+            share * (1 - share) / total + z2 / total / 4) / (1 + z2)
+        low, high = center - half, center + half
+    else:
+        share = low = high = numpy.zeros_like(votes)
+    return {
+        'total': int(total),
+        'percent': (share * 100).tolist(),
+        'rank': ranks.tolist(),
+        'low': (numpy.maximum(low, 0) * 100).tolist(),
+        'high': (numpy.minimum(high, 1) * 100).tolist(),
+        'top': order[:top].tolist(),
+    }
+
+
+def _compute_python(votes, top):
+    total = sum(votes)
+    order = sorted(range(len(votes)), key=lambda i: -votes[i])
+    ranks = [0] * len(votes)
+    for position, i in enumerate(order):
+        if position and votes[i] == votes[order[position - 1]]:
+            ranks[i] = ranks[order[position - 1]]
+        else:
+            ranks[i] = position + 1
+    percent, low, high = [], [], []
+    z2 = Z * Z / total if total else 0
+    for count in votes:
+        if not total:
+            percent.append(0.0)
+            low.append(0.0)
+            high.append(0.0)
+            continue
+        share = count / total
+        center = (share + z2 / 2) / (1 + z2)
+        half = Z * math.sqrt(
+            share * (1 - share) / total + z2 / total / 4) / (1 + z2)
+        percent.append(share * 100)
+        low.append(max(center - half, 0) * 100)
+        high.append(min(center + half, 1) * 100)
+    return {
+        'total': total,
+        'percent': percent,
+        'rank': ranks,
+        'low': low,
+        'high': high,
+        'top': order[:top],
+    }
+
+
+def compute(votes, top=None):
+    """
+    Return the statistics of a list of vote counts as a dict of 'total'
+    and of per choice lists 'percent', 'rank', 'low' and 'high' (in the
+    order of 'votes'), and 'top', the indexes of the 'top' leading choices.
+    """
+    if top is None:
+        top = top_count()
+    if numpy is not None and len(votes) >= NUMPY_MIN_CHOICES:
+        return _compute_numpy(votes, top)
+    return _compute_python(votes, top)
+
+
+def question_results(question):
+    """
+    Return the results of 'question' as a dict of 'total', 'choices' (one
+    dict per choice, in choice_set order) and 'top' (the ids of the
+    leading choices).
+    """
+    key = 'polls:results:%d:%s' % (question.id, question.version)
+    results = cache.get(key)
+    if results is not None:
+        return results
+    choices = list(question.choice_set.all())
+    stats = compute([choice.votes for choice in choices])
+    results = {
+        'question': question.id,
+        'total': stats['total'],
+        'choices': [
+            {'id': choice.id, 'choice_text': choice.choice_text,
+             'votes': choice.votes, 'percent': percent, 'rank': rank,
+             'low': low, 'high': high}
+            for choice, percent, rank, low, high in zip(
+                choices, stats['percent'], stats['rank'], stats['low'],
+                stats['high'])],
+        'top': [choices[i].id for i in stats['top']],
+    }
+    cache.set(key, results, getattr(settings, 'POLLS_OBJECT_CACHE_TIMEOUT',
+                                    300))
+    return results
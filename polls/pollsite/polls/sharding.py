@@ -0,0 +1,110 @@
+"""
+Horizontal partitioning of polls over several databases.
+
+Each question lives, together with its choices, vote history and archived
+copy, in one of the databases listed in POLLS_SHARDS, chosen by its id
+(shard_for()); every shard also has its own vote queue checkpoint. Votes on
+questions in different shards then go to different database files and don't
+wait for each other's write lock.
+
+ShardRouter sends saves, deletes and related lookups to the right shard.
+Lookups by primary key must pick the shard themselves:
+
+    Question.objects.using(sharding.shard_for(pk)).get(pk=pk)
+
+and queries over all questions must be run on each shard and merged (see
+each_shard()). With more than one shard, new question ids are allocated
+from the QuestionId table of the default database so that they are unique
+over all shards.
+
+After changing POLLS_SHARDS, migrate the new databases and move the
+questions to their new shard with the 'rebalance_shards' command.
+"""
+from django.conf import settings
+from django.db.models import Max
+
+SHARDED_MODELS = ('question', 'choice', 'votebucket', 'votequeuecheckpoint',
+                  'archivedquestion', 'archivedchoice')
+
+
+def shards():
+    """
+    Return the aliases of the databases holding questions.
+    """
+    return getattr(settings, 'POLLS_SHARDS', ['default'])
+
+
+def shard_for(question_id):
+    """
+    Return the alias of the database holding the given question.
+    """
+    aliases = shards()
+    return aliases[int(question_id) % len(aliases)]
+
+
+def each_shard(queryset):
+    """
+    Return a copy of 'queryset' for every shard.
+    """
+    return [queryset.using(alias) for alias in shards()]
+
+
+def allocate_question_id():
+    """
+    Return an id for a new question, or None to let a single shard number
+    its questions itself.
+    """
+    if len(shards()) == 1:
+        return None
+    from .models import QuestionId
+    return QuestionId.objects.using('default').create().pk
+
+
+def reserve_question_ids():
+    """
+    Make sure allocate_question_id() never returns the id of an existing
+    question, e.g. of one created while there was a single shard.
+    """
+    from .models import Question, QuestionId
+    highest = max(Question.objects.using(alias).aggregate(
+        highest=Max('pk'))['highest'] or 0 for alias in shards())
+    allocated = QuestionId.objects.using('default').aggregate(
+        highest=Max('pk'))['highest'] or 0
+    if highest > allocated:
+        # SQLite numbers the following rows from here.
+        QuestionId.objects.using('default').create(pk=highest)
+
+
+class ShardRouter(object):
+    """
+    Routes questions and the rows belonging to them to their shard.
+    """
+
+    def _shard(self, model, **hints):
+        if (model._meta.app_label != 'polls' or
+                model._meta.model_name not in SHARDED_MODELS):
+            return None
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        if instance._meta.model_name in ('question', 'archivedquestion'):
+            question_id = instance.pk
+        else:
+            question_id = getattr(instance, 'question_id', None)
+        if question_id is None:
+            return None
+        return shard_for(question_id)
+
+    db_for_read = _shard
+    db_for_write = _shard
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._state.db in shards() and obj2._state.db in shards():
+            return obj1._state.db == obj2._state.db
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == 'default':
+            return None
+        # Other databases only hold the sharded tables.
+        return app_label == 'polls' and model_name in SHARDED_MODELS
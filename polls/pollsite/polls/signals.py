@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, snapshots
+from .models import Choice, Question
+
+
+@receiver(post_delete, sender=Question)
+def remove_question_snapshot(sender, instance, **kwargs):
+    snapshots.remove_snapshot(instance.id)
+
+
+def invalidate(question_id, using=None):
+    caching.bump_version(question_id)
+    # Bump again once the change is committed, in case another request
+    # cached the old rows in between.
+    transaction.on_commit(lambda: caching.bump_version(question_id),
+                          using=using)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def bump_question_version(sender, instance, **kwargs):
+    invalidate(instance.id, kwargs.get('using'))
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def bump_choice_question_version(sender, instance, **kwargs):
+    invalidate(instance.question_id, kwargs.get('using'))
@@ -0,0 +1,92 @@
+"""
+Static snapshots of the results page of closed polls.
+
+Closed polls no longer change, so their results page is rendered once into
+POLLS_SNAPSHOT_ROOT, at the same path as its URL (for example
+polls/3/results/index.html), together with a gzip (and brotli, if the
+'brotli' package is installed) compressed copy. The front-end server can
+then answer those URLs without going through Django, e.g. with nginx:
+
+    location /polls/ {
+        root /path/to/snapshots;
+        gzip_static on;
+        try_files $uri/index.html @django;
+    }
+"""
+import gzip
+import os
+import shutil
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from . import results
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def snapshot_dir(question_id):
+    """
+    Return the directory holding the snapshot of the given question.
+    """
+    url = reverse('polls:results', args=(question_id,))
+    return os.path.join(settings.POLLS_SNAPSHOT_ROOT, url.strip('/'))
+
+
+def _write(path, content):
+    # Write next to the target and rename so that the front-end server
+    # never serves a partially written file.
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(question):
+    """
+    Render the results page of 'question' into its snapshot directory.
+    Return the path of the uncompressed file.
+    """
+    directory = snapshot_dir(question.id)
+    os.makedirs(directory, exist_ok=True)
+    content = render_to_string('polls/results.html', {
+        'question': question,
+        'results': results.question_results(question),
+    }).encode('utf-8')
+    path = os.path.join(directory, 'index.html')
+    _write(path, content)
+    _write(path + '.gz', gzip.compress(content, 9))
+    if brotli is not None:
+        _write(path + '.br', brotli.compress(content))
+    return path
+
+
+def remove_snapshot(question_id):
+    """
+    Remove the snapshot of the given question, if there is one.
+    """
+    shutil.rmtree(snapshot_dir(question_id), ignore_errors=True)
+
+
+def is_public(question):
+    """
+    Tell whether the results page of 'question' is shown to visitors, as
+    it only is for published questions with choices. Snapshots of other
+    questions would leak them through the front-end server.
+    """
+    return question.published and bool(question.choice_set.all())
+
+
+def update_snapshot(question):
+    """
+    Write the snapshot of a closed question and remove the one of an
+    open question, or of one whose results page isn't public.
+    """
+    if question.closed and is_public(question):
+        write_snapshot(question)
+    else:
+        remove_snapshot(question.id)
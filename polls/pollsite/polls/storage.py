@@ -0,0 +1,138 @@
+"""
+Static files storage used in production (see STATICFILES_STORAGE).
+
+On top of ManifestStaticFilesStorage, which adds a content hash to every
+file name so that files can be cached forever, collectstatic also:
+
+* minifies stylesheets that are not minified yet,
+* losslessly recompresses JPEG and PNG images when Pillow is installed,
+* writes gzip (and, if the 'brotli' package is installed, brotli) compressed
+  copies of text files next to them, for the front-end server to serve
+  directly (nginx: gzip_static on; brotli_static on).
+"""
+import gzip
+import io
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+# Quoted strings and comments, matched from left to right so that a quote
+# inside a comment or a comment inside a string is left alone.
+_CSS_STRINGS_AND_COMMENTS = re.compile(
+    r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/)''', re.S)
+
+
+def _minify_css_code(code):
+    code = re.sub(r'\s+', ' ', code)
+    # Only around punctuation where whitespace never matters: around ':'
+    # or '>' it can (as in 'a :hover').
+    code = re.sub(r' ?([{};,]) ?', r'\1', code)
+    return code.replace(';}', '}')
+
+
+def minify_css(css):
+    """
+    Strip comments (except /*! license comments */) and redundant
+    whitespace from a stylesheet, leaving quoted strings unchanged.
+    """
+    output = []
+    code = ''
+    for i, token in enumerate(_CSS_STRINGS_AND_COMMENTS.split(css)):
+        if i % 2 == 0:
+            code += token
+        elif token.startswith('/*') and not token.startswith('/*!'):
+            # A comment separates the tokens on either side of it.
+            code += ' '
+        else:
+            output.append(_minify_css_code(code))
+            output.append(token)
+            code = ''
+    output.append(_minify_css_code(code))
+    return ''.join(output).strip()
+
+
+def optimize_image(content):
+    """
+    Return 'content' losslessly recompressed, or unchanged when that does
+    not make it smaller.
+    """
+    image = Image.open(io.BytesIO(content))
+    output = io.BytesIO()
+    if image.format == 'JPEG':
+        image.save(output, 'JPEG', quality='keep', optimize=True,
+                   progressive=True)
+    elif image.format == 'PNG':
+        image.save(output, 'PNG', optimize=True)
+    else:
+        return content
+    optimized = output.getvalue()
+    return optimized if len(optimized) < len(content) else content
+
+
+def gzip_compress(content):
+    output = io.BytesIO()
+    # A fixed mtime keeps the output identical between deploys.
+    with gzip.GzipFile(fileobj=output, mode='wb', compresslevel=9,
+                       mtime=0) as f:
+        f.write(content)
+    return output.getvalue()
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    compressed_extensions = ('.css', '.js', '.svg', '.txt', '.html', '.json',
+                             '.map', '.eot', '.ttf')
+    image_extensions = ('.jpg', '.jpeg', '.png')
+
+    def post_process(self, paths, dry_run=False, **options):
+        for processed in super(CompressedManifestStaticFilesStorage,
+                               self).post_process(paths, dry_run, **options):
+            yield processed
+        if dry_run:
+            return
+        for name, hashed_name in self.hashed_files.items():
+            if self.optimize(name, hashed_name):
+                yield name, hashed_name, True
+
+    def optimize(self, name, hashed_name):
+        """
+        Minify or optimize the hashed copy of 'name' in place and write
+        its compressed copies. Return True if anything was written.
+        """
+        with self.open(hashed_name) as f:
+            content = original = f.read()
+        lower_name = name.lower()
+        if lower_name.endswith('.css') and not lower_name.endswith('.min.css'):
+            content = minify_css(content.decode('utf-8')).encode('utf-8')
+        elif lower_name.endswith(self.image_extensions) and Image is not None:
+            content = optimize_image(content)
+        if content != original:
+            self.delete(hashed_name)
+            self._save(hashed_name, ContentFile(content))
+        if lower_name.endswith(self.compressed_extensions):
+            self.save_compressed(hashed_name + '.gz', gzip_compress(content),
+                                 content)
+            if brotli is not None:
+                self.save_compressed(hashed_name + '.br',
+                                     brotli.compress(content), content)
+            return True
+        return content != original
+
+    def save_compressed(self, name, compressed, content):
+        # Tiny files can grow when compressed; the server then falls back
+        # to the plain file.
+        if len(compressed) < len(content):
+            if self.exists(name):
+                self.delete(name)
+            self._save(name, ContentFile(compressed))
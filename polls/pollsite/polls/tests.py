@@ -1,10 +1,36 @@
 import datetime
+import gzip
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
 
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.core.wsgi import get_wsgi_application
+from django.db import close_old_connections
 from django.urls import reverse
 from django.utils import timezone
-from django.test import TestCase
+from django.utils.functional import empty
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
 
-from .models import Question
+from . import (archive, backup, caching, history, objectcache, profiling,
+               publishing, ratelimit, results, sharding, snapshots, storage,
+               votequeue, warmup)
+from .management.commands.loadtest import percentile
+from .middleware import LeanSessionMiddleware
+from .models import (ArchivedChoice, ArchivedQuestion, Choice, Question,
+                     VoteBucket, VoteQueueCheckpoint)
+from .storage import minify_css
 
 
 def create_question(question_text, days):
@@ -33,6 +59,71 @@ def create_question_with_choice(question_text, days, choice_text, votes=0):
     add_choice(question, choice_text=choice_text, votes=votes)
     return question
 
+def create_questions(*questions):
+    """
+    Create questions and their choices with two bulk inserts and return
+    them in the given order. Each question is given as a
+    (question_text, days, choices) tuple, where 'choices' is a list of
+    (choice_text, votes) tuples. Question texts must be unique.
+    """
+    now = timezone.now()
+    Question.objects.bulk_create([
+        Question(question_text=question_text,
+                 pub_date=now + datetime.timedelta(days=days),
+                 published=days <= 0)
+        for question_text, days, choices in questions])
+    created = {question.question_text: question
+               for question in Question.objects.filter(question_text__in=[
+                   question_text for question_text, days, choices in questions])}
+    Choice.objects.bulk_create([
+        Choice(question=created[question_text], choice_text=choice_text,
+               votes=votes)
+        for question_text, days, choices in questions
+        for choice_text, votes in choices])
+    return [created[question_text]
+            for question_text, days, choices in questions]
+
+def use_shared_cache(test):
+    """
+    Replace the default cache with a file based one in a temporary
+    directory, which other processes can share, for the duration of 'test'.
+    Return its CACHES setting.
+    """
+    location = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, location)
+    caches = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': location,
+    }}
+    settings = test.settings(CACHES=caches)
+    settings.enable()
+    test.addCleanup(settings.disable)
+    return caches
+
+def bump_version_in_other_process(caches, question_id):
+    """
+    Bump the version of the given question from another process, which
+    only shares the cache described by 'caches' with this one.
+    """
+    subprocess.check_call([sys.executable, '-c', (
+        'from django.conf import settings\n'
+        'settings.configure(CACHES=%r)\n'
+        'from polls import caching\n'
+        'caching.bump_version(%d)\n' % (caches, question_id))],
+        cwd=settings.BASE_DIR)
+
+
+class PollsTestCase(TestCase):
+    """
+    Starts every test with empty caches and fresh vote rate limits, so
+    that cached data and used up tokens never leak between tests.
+    """
+
+    def setUp(self):
+        cache.clear()
+        objectcache.clear()
+        ratelimit.reset()
+
 class QuestionModelTests(TestCase):
 
     def test_was_published_recently_with_future_question(self):
@@ -63,7 +154,7 @@ class QuestionModelTests(TestCase):
         self.assertIs(recent_question.was_published_recently(), True)
 
 
-class QuestionIndexViewTests(TestCase):
+class QuestionIndexViewTests(PollsTestCase):
     def test_no_questions(self):
         """
         If no questions exist, an appropriate message is displayed.
@@ -79,9 +170,7 @@ class QuestionIndexViewTests(TestCase):
         index page. It checks is question with one choice
         is displayed as well. No need for 'test_past_question_with_one_choice'.
         """
-        create_question_with_choice(question_text="Past question.",
-                                               days=-30,
-                                               choice_text='Choice 1.')
+        create_questions(("Past question.", -30, [('Choice 1.', 0)]))
         response = self.client.get(reverse('polls:index'))
         self.assertQuerysetEqual(
             response.context['latest_question_list'],
@@ -93,9 +182,7 @@ class QuestionIndexViewTests(TestCase):
         Questions with a pub_date in the future aren't displayed on
         the index page.
         """
-        create_question_with_choice(question_text="Future question.",
-                                               days=30,
-                                               choice_text='Choice 1.')
+        create_questions(("Future question.", 30, [('Choice 1.', 0)]))
         response = self.client.get(reverse('polls:index'))
         self.assertContains(response, "No polls are available.")
         self.assertQuerysetEqual(response.context['latest_question_list'], [])
@@ -105,12 +192,8 @@ class QuestionIndexViewTests(TestCase):
         Even if both past and future questions exist, only past questions
         are displayed.
         """
-        create_question_with_choice(question_text="Past question.",
-                                           days=-30,
-                                           choice_text='Choice 1.')
-        create_question_with_choice(question_text="Future question.",
-                                 days=30,
-                                 choice_text='Choice 2.')
+        create_questions(("Past question.", -30, [('Choice 1.', 0)]),
+                         ("Future question.", 30, [('Choice 2.', 0)]))
         response = self.client.get(reverse('polls:index'))
         self.assertQuerysetEqual(
             response.context['latest_question_list'],
@@ -121,12 +204,8 @@ class QuestionIndexViewTests(TestCase):
         """
         The questions index page may display multiple questions.
         """
-        create_question_with_choice(question_text="Past question 1.",
-                                            days=-30,
-                                            choice_text='Choice 1.')
-        create_question_with_choice(question_text="Past question 2.",
-                                    days=-5,
-                                    choice_text='Choice 2.')
+        create_questions(("Past question 1.", -30, [('Choice 1.', 0)]),
+                         ("Past question 2.", -5, [('Choice 2.', 0)]))
         response = self.client.get(reverse('polls:index'))
         self.assertQuerysetEqual(
             response.context['latest_question_list'],
@@ -137,7 +216,7 @@ class QuestionIndexViewTests(TestCase):
         """
         Question without choices should not be displayed on the index page.
         """
-        create_question(question_text='Choiceless question.', days=-5)
+        create_questions(('Choiceless question.', -5, []))
         response = self.client.get(reverse('polls:index'))
         self.assertEqual(response.status_code, 200)
         self.assertQuerysetEqual(response.context['latest_question_list'], [])
@@ -147,10 +226,8 @@ class QuestionIndexViewTests(TestCase):
         """
         Questions with at least one choice are listed on the index page.
         """
-        choice_question = create_question(question_text='Multiple choices',
-                                          days=-1)
-        add_choice(choice_question, choice_text='Choice 1', votes=1)
-        add_choice(choice_question, choice_text='Choice 2', votes=0)
+        create_questions(('Multiple choices', -1,
+                          [('Choice 1', 1), ('Choice 2', 0)]))
         response = self.client.get(reverse('polls:index'))
         self.assertQuerysetEqual(
             response.context['latest_question_list'],
@@ -160,11 +237,8 @@ class QuestionIndexViewTests(TestCase):
         """
         Only the questions with choice(s) are listed.
         """
-        create_question(question_text='Choiceless question', days=-1)
-        create_question_with_choice(question_text='Question with choice.',
-                                    days=-1,
-                                    choice_text='Choose me.',
-                                    votes=0)
+        create_questions(('Choiceless question', -1, []),
+                         ('Question with choice.', -1, [('Choose me.', 0)]))
         response = self.client.get(reverse('polls:index'))
         self.assertQuerysetEqual(response.context['latest_question_list'],
                                  ['<Question: Question with choice.>'])
@@ -173,26 +247,30 @@ class QuestionIndexViewTests(TestCase):
         """
         Both questions with choices are displayed.
         """
-        create_question_with_choice(question_text='Choices 1',
-                                     days=-5,
-                                     choice_text='Choice 1')
-        create_question_with_choice(question_text='Choices 2',
-                                     days=-30,
-                                     choice_text='Choice 2',
-                                     votes=1)
+        create_questions(('Choices 1', -5, [('Choice 1', 0)]),
+                         ('Choices 2', -30, [('Choice 2', 1)]))
         response = self.client.get(reverse('polls:index'))
         self.assertQuerysetEqual(
             response.context['latest_question_list'],
             ['<Question: Choices 1>','<Question: Choices 2>'])
 
-class QuestionDetailViewTests(TestCase):
+class QuestionDetailViewTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        (cls.future_question, cls.past_question, cls.past_question_choiceless,
+         cls.past_question_multiple) = create_questions(
+            ('Future question.', 5, []),
+            ('Past question.', -5, [('Choice', 0)]),
+            ('Past question', -1, []),
+            ('Past question with multiple choice.', -2,
+             [('Choice 1.', 0), ('Choice 2.', 1)]))
+
     def test_future_question(self):
         """
         The detail view of a question with a pub_date in the future
         return a 404 not found.
         """
-        future_question = create_question(question_text='Future question.', days=5)
-        url = reverse('polls:detail', args=(future_question.id,))
+        url = reverse('polls:detail', args=(self.future_question.id,))
         response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
 
@@ -201,22 +279,17 @@ class QuestionDetailViewTests(TestCase):
         The detail view if a question with a pub_date in the past
         and one choice displays the question's and the choice's text.
         """
-        past_question = create_question(question_text='Past question.', days=-5)
-        add_choice(past_question, choice_text='Choice')
-        url = reverse('polls:detail', args=(past_question.id,))
+        url = reverse('polls:detail', args=(self.past_question.id,))
         response = self.client.get(url)
-        self.assertContains(response, past_question.question_text)
+        self.assertContains(response, self.past_question.question_text)
         self.assertContains(response,
-                            past_question.choice_set.get(pk=1).choice_text)
+                            self.past_question.choice_set.get().choice_text)
 
     def test_past_question_without_choice(self):
         """
         The detail view of a choiceless quesion return a 404 not found.
         """
-        past_question_choiceless = create_question(
-            question_text='Past question',
-            days=-1)
-        url = reverse('polls:detail', args=(past_question_choiceless.id,))
+        url = reverse('polls:detail', args=(self.past_question_choiceless.id,))
         response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
 
@@ -225,27 +298,32 @@ class QuestionDetailViewTests(TestCase):
         The detail view of a question with multiple choices
         display the question's text and a list of the choice's text.
         """
-        past_question_multiple = create_question(
-            question_text='Past question with multiple choice.',
-            days=-2)
-        add_choice(past_question_multiple, choice_text='Choice 1.')
-        add_choice(past_question_multiple, choice_text='Choice 2.', votes=1)
-        url = reverse('polls:detail', args=(past_question_multiple.id,))
+        url = reverse('polls:detail', args=(self.past_question_multiple.id,))
         response = self.client.get(url)
-        self.assertContains(response, past_question_multiple.question_text)
+        self.assertContains(response,
+                            self.past_question_multiple.question_text)
         self.assertQuerysetEqual(
             response.context['question'].choice_set.all(),
             ['<Choice: Choice 1.>', '<Choice: Choice 2.>'], ordered=False)
 
 
-class QuestionResultsViewTests(TestCase):
+class QuestionResultsViewTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        (cls.future_question, cls.past_question, cls.past_question_choiceless,
+         cls.past_question_multiple) = create_questions(
+            ('Future question.', 5, []),
+            ('Past question.', -5, [('Choice 1.', 0)]),
+            ('Past choiceless question.', -5, []),
+            ('Past question, multiple choices.', -1,
+             [('Choice 1', 1), ('Choice 2', 5), ('Choice 3', 0)]))
+
     def test_future_question(self):
         """
         The results view of the question with a pub_date in the future
         returns a 404 not found like the detail view.
         """
-        future_question = create_question(question_text='Future question.', days=5)
-        url = reverse('polls:results', args=(future_question.id,))
+        url = reverse('polls:results', args=(self.future_question.id,))
         response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
 
@@ -254,21 +332,19 @@ class QuestionResultsViewTests(TestCase):
         The results view of a question with pub_date in the past
         displays the questions text with the results of the vote.
         """
-        past_question = create_question(question_text='Past question.', days=-5)
-        past_question_with_votes = add_choice(past_question, 
-                                               choice_text='Choice 1.')
-        url = reverse('polls:results', args=(past_question.id,))
+        url = reverse('polls:results', args=(self.past_question.id,))
         response = self.client.get(url)
-        self.assertContains(response, past_question.question_text)
-        self.assertContains(response, past_question_with_votes.choice_text)
+        self.assertContains(response, self.past_question.question_text)
+        self.assertContains(response,
+                            self.past_question.choice_set.get().choice_text)
 
     def test_past_question_without_choice(self):
         """
         The results view of a past question without choices
         return 404 not found like the detail view.
         """
-        past_question = create_question(question_text='Past choiceless question.', days=-5)
-        url = reverse('polls:results', args=(past_question.id,))
+        url = reverse('polls:results',
+                      args=(self.past_question_choiceless.id,))
         response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
 
@@ -278,84 +354,57 @@ class QuestionResultsViewTests(TestCase):
         choices displays the question text with the choices and votes
         of regarding question.
         """
-        past_question = create_question(
-            question_text='Past question, multiple choices.',
-            days = -1)
-        add_choice(
-            past_question,
-            choice_text = 'Choice 1',
-            votes = 1)
-        add_choice(
-            past_question,
-            choice_text = 'Choice 2',
-            votes = 5)
-        add_choice(
-            past_question,
-            choice_text = 'Choice 3')
         url = reverse('polls:results',
-                      args=(past_question.id,))
+                      args=(self.past_question_multiple.id,))
         response = self.client.get(url)
         self.assertContains(response,
-                            past_question.question_text)
+                            self.past_question_multiple.question_text)
         for (chid, votenum) in zip([0,1,2], [1, 5, 0]):
             self.assertEqual(
                 response.context['question'].choice_set.all()[chid].votes,
                 votenum)
 
 
-class VoteTestClass(TestCase):
+class VoteTestClass(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.question, = create_questions(
+            ("Question 1.", -2, [("Choice 1.", 0)]))
+        cls.choice = cls.question.choice_set.get()
+        cls.url = reverse('polls:vote', args=(cls.question.id,))
+
     def test_vote_raise_error(self):
         """
-        Voting when nothing selected raises a DoesNotExist error.
+        Voting when nothing selected doesn't raise the KeyError of the
+        missing 'choice' and doesn't count a vote.
         """
-        question = create_question(
-            question_text="Question 1.",
-            days = -2)
-        add_choice(question, choice_text="Choice 1.")
-        url = reverse('polls:vote', args=(question.id,))
-        response = self.client.post(url)
-        self.assertRaises("Keyerror")
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.question.choice_set.get().votes, 0)
 
 
     def test_vote_increments(self):
         """
         One vote should increment the number of votes of the choice.
         """
-        question = create_question(
-            question_text="Question 1.",
-            days = -2)
-        add_choice(question, choice_text="Choice 1.")
-        initial_vote = question.choice_set.get(pk=1).votes
-        url = reverse('polls:vote', args=(question.id,))
-        response = self.client.post(url,
-                                    {'choice': question.choice_set.all()[0].pk})
-        after_vote = question.choice_set.get(pk=1).votes
+        initial_vote = self.question.choice_set.get(pk=self.choice.pk).votes
+        response = self.client.post(self.url, {'choice': self.choice.pk})
+        after_vote = self.question.choice_set.get(pk=self.choice.pk).votes
         self.assertEqual(initial_vote + 1, after_vote)
 
     def test_redicerts_on_successful_vote(self):
         """
         After a successful vote the Detail view redirects to a Results view.
         """
-        question = create_question(
-            question_text="Question 1.",
-            days = -2)
-        add_choice(question, choice_text="Choice 1.")
-        url = reverse('polls:vote', args=(question.id,))
-        response = self.client.post(url,
-                                    {'choice': question.choice_set.all()[0].pk})
+        response = self.client.post(self.url, {'choice': self.choice.pk})
         self.assertRedirects(response, reverse('polls:results', 
-                                               args=(question.id,)))
+                                               args=(self.question.id,)))
 
     def test_renders_DetailView_on_failed_vote(self):
         """
         Faild vote should render DeatilView.
         """
-        question = create_question(
-            question_text="Question 1.",
-            days = -2)
-        add_choice(question, choice_text="Choice 1.")
-        url = reverse('polls:vote', args=(question.id,))
-        response = self.client.post(url)
+        response = self.client.post(self.url)
         self.assertTemplateUsed(response, "polls/detail.html")
 
     def test_renders_error_msg_on_failed_vote(self):
@@ -363,11 +412,900 @@ class VoteTestClass(TestCase):
         After an unsuccessful vote the Detail view rendered with
         an appropriate error message.
         """
-        question = create_question(
-            question_text="Question 1.",
-            days = -2)
-        add_choice(question, choice_text="Choice 1.")
-        url = reverse('polls:vote', args=(question.id,))
-        response = self.client.post(url)
+        response = self.client.post(self.url)
         self.assertEqual(response.context['error_message'],
                          "You didn't select a choice.")
+
+
+class VoteHistoryTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.question, = create_questions(
+            ("Question 1.", -2, [("Choice 1.", 0)]))
+        cls.choice = cls.question.choice_set.get()
+
+    def test_vote_records_minute_bucket(self):
+        """
+        A successful vote is counted in the minute bucket of its choice.
+        """
+        url = reverse('polls:vote', args=(self.question.id,))
+        self.client.post(url, {'choice': self.choice.pk})
+        self.client.post(url, {'choice': self.choice.pk})
+        bucket = VoteBucket.objects.get(choice=self.choice)
+        self.assertEqual(bucket.resolution, VoteBucket.MINUTE)
+        self.assertEqual(bucket.votes, 2)
+
+    def test_rollup_merges_minutes_into_hour(self):
+        """
+        Old minute buckets are replaced by one bucket per hour holding
+        their sum, recent minute buckets are kept.
+        """
+        now = timezone.now()
+        old = now - datetime.timedelta(days=2)
+        history.record_vote(self.choice, when=old.replace(minute=1))
+        history.record_vote(self.choice, votes=2, when=old.replace(minute=2))
+        history.record_vote(self.choice, when=now)
+        self.assertEqual(history.rollup(), 2)
+        hour = VoteBucket.objects.get(resolution=VoteBucket.HOUR)
+        self.assertEqual(hour.votes, 3)
+        self.assertEqual(hour.start,
+                         history.bucket_start(old, VoteBucket.HOUR))
+        self.assertEqual(
+            VoteBucket.objects.filter(resolution=VoteBucket.MINUTE).count(), 1)
+
+    def test_hourly_series_includes_minutes(self):
+        """
+        The hourly time series combines rolled up and recent buckets.
+        """
+        now = timezone.now()
+        old = now - datetime.timedelta(days=2)
+        history.record_vote(self.choice, when=old)
+        history.rollup()
+        history.record_vote(self.choice, votes=4, when=now)
+        series = history.time_series(self.question, VoteBucket.HOUR)
+        self.assertEqual(series, [
+            (history.bucket_start(old, VoteBucket.HOUR), {self.choice.pk: 1}),
+            (history.bucket_start(now, VoteBucket.HOUR), {self.choice.pk: 4}),
+        ])
+
+
+@override_settings(POLLS_VOTE_BURST=2, POLLS_VOTE_RATE=0.001)
+class VoteRateLimitTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.question, = create_questions(
+            ("Question 1.", -2, [("Choice 1.", 0)]))
+        cls.choice = cls.question.choice_set.get()
+        cls.url = reverse('polls:vote', args=(cls.question.id,))
+
+    def test_votes_over_burst_are_rejected(self):
+        """
+        Once the bucket is empty votes are rejected without touching the
+        database and without being counted.
+        """
+        for i in range(2):
+            response = self.client.post(self.url, {'choice': self.choice.pk})
+            self.assertEqual(response.status_code, 302)
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {'choice': self.choice.pk})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.choice.refresh_from_db()
+        self.assertEqual(self.choice.votes, 2)
+
+    def test_clients_are_limited_separately(self):
+        """
+        Each client address has its own bucket.
+        """
+        for address in ('10.0.0.1', '10.0.0.1', '10.0.0.2'):
+            response = self.client.post(self.url, {'choice': self.choice.pk},
+                                        REMOTE_ADDR=address)
+            self.assertEqual(response.status_code, 302)
+
+    def test_local_backend_evicts_least_recently_used(self):
+        """
+        The local backend keeps at most POLLS_RATELIMIT_MAX_KEYS buckets.
+        """
+        with self.settings(POLLS_RATELIMIT_MAX_KEYS=2):
+            backend = ratelimit.get_backend()
+            for key in ('a', 'b', 'a', 'c'):
+                backend.consume(key, 1.0, 2, 0)
+            self.assertEqual(list(backend.buckets), ['a', 'c'])
+
+
+class ClosedQuestionTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        question, = create_questions(
+            ("Closed question.", -2, [("Choice 1.", 3)]))
+        Question.objects.filter(pk=question.pk).update(closed=True)
+        cls.question_id = question.pk
+
+    def setUp(self):
+        super(ClosedQuestionTests, self).setUp()
+        self.snapshot_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.snapshot_root)
+        settings = self.settings(POLLS_SNAPSHOT_ROOT=self.snapshot_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # These tests modify and delete the question, so use a fresh copy.
+        self.question = Question.objects.get(pk=self.question_id)
+        self.choice = self.question.choice_set.get()
+
+    def test_vote_on_closed_question_is_not_counted(self):
+        """
+        Voting on a closed question renders the detail page without
+        counting the vote.
+        """
+        url = reverse('polls:vote', args=(self.question.id,))
+        response = self.client.post(url, {'choice': self.choice.pk})
+        self.assertContains(response, "This poll is closed.")
+        self.choice.refresh_from_db()
+        self.assertEqual(self.choice.votes, 3)
+
+    def test_snapshot_matches_results_page(self):
+        """
+        The snapshot of a closed question holds its results page, plus a
+        gzip compressed copy.
+        """
+        path = snapshots.write_snapshot(self.question)
+        self.assertEqual(path, os.path.join(
+            self.snapshot_root, 'polls', str(self.question.id), 'results',
+            'index.html'))
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+        response = self.client.get(reverse('polls:results',
+                                           args=(self.question.id,)))
+        self.assertEqual(content, response.content.decode('utf-8'))
+        self.assertTrue(os.path.exists(path + '.gz'))
+
+    def test_reopening_and_deleting_remove_snapshot(self):
+        """
+        Open and deleted questions have no snapshot.
+        """
+        path = snapshots.write_snapshot(self.question)
+        self.question.closed = False
+        snapshots.update_snapshot(self.question)
+        self.assertFalse(os.path.exists(path))
+        snapshots.write_snapshot(self.question)
+        self.question.delete()
+        self.assertFalse(os.path.exists(path))
+
+
+    def test_only_public_questions_get_a_snapshot(self):
+        """
+        Closed questions that aren't published yet or have no choices get
+        no snapshot, from the command or when saved.
+        """
+        future, empty = create_questions(
+            ("Future closed question.", 5, [("Choice 1.", 0)]),
+            ("Closed question without choices.", -2, []))
+        Question.objects.filter(pk__in=[future.pk, empty.pk]).update(
+            closed=True)
+        call_command('snapshot_polls', stdout=io.StringIO())
+        self.assertTrue(os.path.exists(os.path.join(
+            snapshots.snapshot_dir(self.question.id), 'index.html')))
+        for question in (future, empty):
+            question.refresh_from_db()
+            snapshots.update_snapshot(question)
+            self.assertFalse(os.path.exists(
+                snapshots.snapshot_dir(question.id)))
+
+
+class FragmentCacheTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        question, = create_questions(
+            ("Question 1.", -2, [("Choice 1.", 0)]))
+        cls.question_id = question.pk
+
+    def setUp(self):
+        super(FragmentCacheTests, self).setUp()
+        self.question = Question.objects.get(pk=self.question_id)
+        self.choice = self.question.choice_set.get()
+
+    def test_vote_invalidates_cached_results(self):
+        """
+        The cached choice list of the results page is replaced after a
+        vote.
+        """
+        url = reverse('polls:results', args=(self.question.id,))
+        self.assertContains(self.client.get(url), "Choice 1. -- 0 votes")
+        self.client.post(reverse('polls:vote', args=(self.question.id,)),
+                         {'choice': self.choice.pk})
+        self.assertContains(self.client.get(url), "Choice 1. -- 1 vote<")
+
+    def test_edit_invalidates_cached_choices(self):
+        """
+        Editing a choice changes the question version and with it the
+        cached choice list of the detail page.
+        """
+        url = reverse('polls:detail', args=(self.question.id,))
+        version = self.question.version
+        self.assertContains(self.client.get(url), "Choice 1.")
+        self.choice.choice_text = "Renamed choice."
+        self.choice.save()
+        self.assertNotEqual(self.question.version, version)
+        self.assertContains(self.client.get(url), "Renamed choice.")
+
+    def test_profile_times_templates_and_blocks(self):
+        """
+        Rendering inside profile() records the templates and blocks used.
+        """
+        with profiling.profile() as timings:
+            self.client.get(reverse('polls:index'))
+        self.assertIn('template polls/home.html', timings)
+        self.assertIn('template polls/index.html', timings)
+        self.assertIn('block navbar', timings)
+
+
+class MinifyCssTests(TestCase):
+    def test_minify_css(self):
+        """
+        Comments and redundant whitespace are removed, license comments
+        are kept.
+        """
+        css = "/*! License */\n/* note */\nli a {\n    color: green;\n}\n"
+        self.assertEqual(minify_css(css), "/*! License */ li a{color: green}")
+
+    def test_minify_css_keeps_meaningful_whitespace_and_strings(self):
+        """
+        Whitespace that changes a selector and the contents of quoted
+        strings are kept.
+        """
+        self.assertEqual(minify_css("a :hover , a > b {\n  color: red;\n}"),
+                         "a :hover,a > b{color: red}")
+        css = "p::after { content: \"a  /* b */ ; }\" ; }\n/* c */"
+        self.assertEqual(minify_css(css),
+                         "p::after{content: \"a  /* b */ ; }\"}")
+        self.assertEqual(minify_css("q { quotes: '\\'' \"'\" ; }"),
+                         "q{quotes: '\\'' \"'\"}")
+
+
+class CollectStaticTests(TestCase):
+    def setUp(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        settings = self.settings(
+            STATIC_ROOT=static_root,
+            STATICFILES_STORAGE='polls.storage.'
+                                'CompressedManifestStaticFilesStorage')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_collectstatic_minifies_and_compresses(self):
+        """
+        The fingerprinted stylesheet is minified, and its compressed copies
+        decompress to the same bytes.
+        """
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     stdout=io.StringIO())
+        path = staticfiles_storage.path(
+            staticfiles_storage.stored_name('polls/style.css'))
+        self.assertNotEqual(path, staticfiles_storage.path('polls/style.css'))
+        with open(path, 'rb') as f:
+            content = f.read()
+        self.assertIn(b'li a{color: green}', content)
+        self.assertNotIn(b'\n', content)
+        with gzip.open(path + '.gz', 'rb') as f:
+            self.assertEqual(f.read(), content)
+        if storage.brotli is not None:
+            with open(path + '.br', 'rb') as f:
+                self.assertEqual(storage.brotli.decompress(f.read()), content)
+
+
+class LoadTestTests(TestCase):
+    def test_percentile(self):
+        """
+        percentile() uses the nearest rank of a sorted list.
+        """
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([], 50), 0)
+
+
+class QueuedVoteTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.question, = create_questions(
+            ("Question 1.", -2, [("Choice 1.", 0)]))
+        cls.choice = cls.question.choice_set.get()
+
+    def setUp(self):
+        super(QueuedVoteTests, self).setUp()
+        queue_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, queue_dir)
+        settings = self.settings(
+            POLLS_ASYNC_VOTES=True,
+            POLLS_VOTE_QUEUE_PATH=os.path.join(queue_dir, 'queue.sqlite3'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def vote(self):
+        return self.client.post(reverse('polls:vote', args=(self.question.id,)),
+                                {'choice': self.choice.pk})
+
+    def test_vote_is_queued_until_processed(self):
+        """
+        A queued vote is counted, once per choice and in the history, when
+        the worker processes the queue.
+        """
+        self.vote()
+        self.vote()
+        self.assertEqual(votequeue.lag()[0], 2)
+        self.assertEqual(self.question.choice_set.get().votes, 0)
+        self.assertEqual(votequeue.process_batch(), 2)
+        self.assertEqual(self.question.choice_set.get().votes, 2)
+        self.assertEqual(VoteBucket.objects.get(choice=self.choice).votes, 2)
+        self.assertEqual(votequeue.lag(), (0, 0))
+
+    def test_applied_batch_is_not_counted_twice(self):
+        """
+        Votes applied before a crash, but still in the queue, are skipped.
+        """
+        self.vote()
+        self.vote()
+        # The first vote was applied, but the worker died before removing
+        # it from the queue.
+        VoteQueueCheckpoint.objects.create(pk=1, last_id=1,
+                                           queue_id=votequeue.queue_id())
+        self.assertEqual(votequeue.process_batch(), 1)
+        self.assertEqual(self.question.choice_set.get().votes, 1)
+        self.assertEqual(votequeue.lag()[0], 0)
+
+    def test_checkpoint_of_replaced_queue_is_ignored(self):
+        """
+        Votes in a new queue file are applied even though their ids are
+        below the checkpoint left by the previous file.
+        """
+        VoteQueueCheckpoint.objects.create(pk=1, last_id=100,
+                                           queue_id='replaced')
+        self.vote()
+        self.assertEqual(votequeue.process_batch(), 1)
+        self.assertEqual(self.question.choice_set.get().votes, 1)
+        self.assertEqual(VoteQueueCheckpoint.objects.get().queue_id,
+                         votequeue.queue_id())
+
+
+    def test_votes_for_deleted_choice_are_dropped(self):
+        """
+        Votes for a choice deleted before the worker runs are dropped
+        instead of failing the batch.
+        """
+        other = add_choice(self.question, "Choice 2.")
+        self.vote()
+        self.client.post(reverse('polls:vote', args=(self.question.id,)),
+                         {'choice': other.pk})
+        self.choice.delete()
+        self.assertEqual(votequeue.process_batch(), 1)
+        self.assertEqual(votequeue.lag()[0], 0)
+        other.refresh_from_db()
+        self.assertEqual(other.votes, 1)
+        self.assertFalse(VoteBucket.objects.filter(
+            choice_id=self.choice.pk).exists())
+
+
+class ObjectCacheTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.question, = create_questions(
+            ("Question 1.", -2, [("Choice 1.", 0), ("Choice 2.", 0)]))
+        cls.url = reverse('polls:detail', args=(cls.question.id,))
+
+    def test_repeated_lookups_hit_local_cache(self):
+        """
+        Only the first lookup of a question reads the database.
+        """
+        with self.assertNumQueries(2):
+            question = objectcache.get_question(self.question.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(objectcache.get_question(self.question.pk),
+                             question)
+            self.assertEqual(len(question.choice_set.all()), 2)
+        self.assertEqual(objectcache.stats(), {
+            'local_hits': 1, 'shared_hits': 0, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_local_miss_hits_shared_cache(self):
+        """
+        A question missing from the local cache is read from the shared
+        cache.
+        """
+        objectcache.get_question(self.question.pk)
+        objectcache.clear()
+        with self.assertNumQueries(0):
+            objectcache.get_question(self.question.pk)
+        self.assertEqual(objectcache.stats()['shared_hits'], 1)
+
+    def test_vote_invalidates_cached_question(self):
+        """
+        After a vote the question is reloaded with the new vote count.
+        """
+        choice = self.question.choice_set.get(choice_text="Choice 1.")
+        objectcache.get_question(self.question.pk)
+        self.client.post(reverse('polls:vote', args=(self.question.id,)),
+                         {'choice': choice.pk})
+        question = objectcache.get_question(self.question.pk)
+        self.assertEqual(question.choice_set.all()[0].votes, 1)
+
+    def test_change_in_other_process_invalidates_cached_question(self):
+        """
+        A question changed by another process, like the vote worker, is
+        reloaded once that process bumps its version in the shared cache.
+        """
+        caches = use_shared_cache(self)
+        objectcache.get_question(self.question.pk)
+        # update() sends no signal, like the updates of the vote worker.
+        self.question.choice_set.update(votes=3)
+        bump_version_in_other_process(caches, self.question.pk)
+        question = objectcache.get_question(self.question.pk)
+        self.assertEqual(question.choice_set.all()[0].votes, 3)
+
+    def test_local_cache_entries_expire(self):
+        """
+        Questions are kept in the local cache for a limited time.
+        """
+        local = objectcache.LRUCache(10, 0.01)
+        local.set('key', 'value')
+        self.assertEqual(local.get('key'), 'value')
+        time.sleep(0.02)
+        self.assertIsNone(local.get('key'))
+
+    def test_deleted_question_is_not_found(self):
+        """
+        A deleted question is not served from the cache.
+        """
+        objectcache.get_question(self.question.pk)
+        Question.objects.get(pk=self.question.pk).delete()
+        self.assertIsNone(objectcache.get_question(self.question.pk))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_cache_stats_requires_staff(self):
+        """
+        Anonymous visitors are sent to the admin login page.
+        """
+        url = reverse('polls:cache_stats')
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class PublishingTests(PollsTestCase):
+    def test_saving_past_question_publishes_it(self):
+        """
+        Questions saved with a pub_date in the past are published at once,
+        future ones are not.
+        """
+        self.assertIs(create_question("Past question.", days=-1).published,
+                      True)
+        self.assertIs(create_question("Future question.", days=1).published,
+                      False)
+
+    def test_publish_due_questions(self):
+        """
+        publish_due() publishes the questions whose pub_date has passed,
+        after which they are shown, also by processes that had cached them
+        unpublished.
+        """
+        caches = use_shared_cache(self)
+        question = create_question_with_choice("Scheduled question.", days=1,
+                                               choice_text="Choice 1.")
+        url = reverse('polls:detail', args=(question.id,))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(publishing.next_publication(), question.pub_date)
+        self.assertEqual(publishing.publish_due(), [])
+        later = question.pub_date + datetime.timedelta(seconds=1)
+        # Like the 'publish_questions' process, publish with cache
+        # connections of its own, which only share the cache directory.
+        with self.settings(CACHES=caches):
+            self.assertEqual(publishing.publish_due(later), [question.id])
+        self.assertIsNone(publishing.next_publication())
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+@unittest.skipUnless('shard1' in settings.DATABASES,
+                     "needs the 'shard1' database of pollsite.test_settings")
+class ShardingTests(PollsTestCase):
+    multi_db = True
+
+    def shards(self):
+        return self.settings(POLLS_SHARDS=['default', 'shard1'])
+
+    def test_questions_are_spread_over_shards(self):
+        """
+        New questions are numbered across shards, stored with their
+        choices and votes in their shard, and all listed on the index.
+        """
+        with self.shards():
+            questions = [
+                create_question_with_choice("Question %d." % i, days=-i,
+                                            choice_text="Choice 1.")
+                for i in range(1, 5)]
+            self.assertEqual(
+                set(sharding.shard_for(question.pk) for question in questions),
+                set(['default', 'shard1']))
+            for question in questions:
+                self.assertEqual(question._state.db,
+                                 sharding.shard_for(question.pk))
+            self.assertEqual(
+                len(set(question.pk for question in questions)), 4)
+            response = self.client.get(reverse('polls:index'))
+            self.assertQuerysetEqual(response.context['latest_question_list'],
+                                     [repr(question) for question in questions])
+
+            question = questions[1]
+            choice = question.choice_set.get()
+            self.client.post(reverse('polls:vote', args=(question.id,)),
+                             {'choice': choice.pk})
+            self.assertEqual(question.choice_set.get().votes, 1)
+            self.assertEqual(VoteBucket.objects.using(
+                question._state.db).get(choice=choice).votes, 1)
+
+    def test_rebalance_moves_questions(self):
+        """
+        'rebalance_shards' moves questions created with one shard to their
+        shard, and new ids don't reuse theirs.
+        """
+        questions = [
+            create_question_with_choice("Question %d." % i, days=-1,
+                                        choice_text="Choice 1.", votes=i)
+            for i in range(1, 4)]
+        with self.shards():
+            call_command('rebalance_shards', stdout=io.StringIO())
+            for question in questions:
+                using = sharding.shard_for(question.pk)
+                moved = Question.objects.using(using).get(pk=question.pk)
+                self.assertEqual(moved.choice_set.get().votes,
+                                 questions.index(question) + 1)
+                response = self.client.get(
+                    reverse('polls:results', args=(question.id,)))
+                self.assertContains(response, 'Choice 1.')
+            self.assertEqual(
+                Question.objects.using('shard1').count(),
+                len([q for q in questions if q.pk % 2]))
+            new = create_question("New question.", days=-1)
+            self.assertGreater(new.pk, max(q.pk for q in questions))
+
+    def test_rebalance_moves_archived_questions(self):
+        """
+        Archived questions move to their shard too, and their results
+        page is still shown.
+        """
+        questions = [
+            create_question_with_choice("Question %d." % i, days=-400,
+                                        choice_text="Choice %d." % i, votes=i)
+            for i in range(1, 4)]
+        archive.archive()
+        # Another archived question, whose choice has the id of a moved one.
+        other = ArchivedQuestion.objects.using('shard1').create(
+            pk=101, question_text="Other question.",
+            pub_date=timezone.now())
+        ArchivedChoice.objects.using('shard1').create(
+            pk=ArchivedChoice.objects.order_by('pk').first().pk,
+            question_id=other.pk, choice_text="Other choice.")
+        with self.shards():
+            call_command('rebalance_shards', stdout=io.StringIO())
+            for i, question in enumerate(questions, 1):
+                using = sharding.shard_for(question.pk)
+                archived = ArchivedQuestion.objects.using(using).get(
+                    pk=question.pk)
+                self.assertEqual(archived.choice_set.get().votes, i)
+                response = self.client.get(
+                    reverse('polls:results', args=(question.id,)))
+                self.assertContains(response, "Choice %d. -- %d vote" % (i, i))
+            self.assertEqual(
+                ArchivedQuestion.objects.using('shard1').count(),
+                1 + len([q for q in questions if q.pk % 2]))
+
+    def test_admin_edits_questions_of_every_shard(self):
+        """
+        The admin lists the questions of every shard, and shows and saves
+        the choices of a question in its own shard.
+        """
+        User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.login(username='admin', password='admin')
+        with self.shards():
+            questions = [
+                create_question_with_choice("Question %d." % i, days=-i,
+                                            choice_text="Choice %d." % i)
+                for i in range(1, 5)]
+            response = self.client.get(
+                reverse('admin:polls_question_changelist'))
+            # Newest first, across the shards.
+            self.assertEqual(list(response.context['cl'].result_list),
+                             questions[::-1])
+            self.assertEqual(response.context['cl'].result_count, 4)
+
+            question = next(q for q in questions if q._state.db == 'shard1')
+            choice = question.choice_set.get()
+            url = reverse('admin:polls_question_change', args=(question.pk,))
+            response = self.client.get(url)
+            self.assertContains(response, choice.choice_text)
+            response = self.client.post(url, {
+                'question_text': question.question_text,
+                'pub_date_0': question.pub_date.strftime('%Y-%m-%d'),
+                'pub_date_1': question.pub_date.strftime('%H:%M:%S'),
+                'choice_set-TOTAL_FORMS': '1',
+                'choice_set-INITIAL_FORMS': '1',
+                'choice_set-MIN_NUM_FORMS': '0',
+                'choice_set-MAX_NUM_FORMS': '1000',
+                'choice_set-0-id': choice.pk,
+                'choice_set-0-question': question.pk,
+                'choice_set-0-choice_text': "Renamed.",
+                'choice_set-0-votes': '0',
+            })
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(Choice.objects.using('shard1').get(
+                pk=choice.pk).choice_text, "Renamed.")
+            self.assertFalse(Choice.objects.using('default').filter(
+                choice_text="Renamed.").exists())
+
+    def test_rebalance_into_shard_with_rows(self):
+        """
+        Choices and vote history moved into a shard that already has some
+        get new ids there.
+        """
+        with self.shards():
+            questions = [
+                create_question_with_choice("Question %d." % i, days=-1,
+                                            choice_text="Choice %d." % i)
+                for i in range(1, 5)]
+            for question in questions:
+                choice = question.choice_set.get()
+                self.client.post(reverse('polls:vote', args=(question.id,)),
+                                 {'choice': choice.pk})
+        call_command('rebalance_shards', stdout=io.StringIO())
+        self.assertEqual(Question.objects.using('shard1').count(), 0)
+        for i, question in enumerate(questions, 1):
+            choice = Choice.objects.get(question=question)
+            self.assertEqual((choice.choice_text, choice.votes),
+                             ("Choice %d." % i, 1))
+            self.assertEqual(VoteBucket.objects.get(question=question).choice,
+                             choice)
+
+
+class ArchiveTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.old, cls.recent = create_questions(
+            ("Old question.", -400, [("Choice 1.", 3), ("Choice 2.", 1)]),
+            ("Recent question.", -2, [("Choice 3.", 0)]))
+
+    def test_old_questions_are_archived(self):
+        """
+        Questions older than the archival age leave the hot tables, in
+        batches, and no longer show up in the public views.
+        """
+        self.assertEqual(archive.archive(batch_size=1), 1)
+        self.assertQuerysetEqual(Question.objects.all(),
+                                 ['<Question: Recent question.>'])
+        self.assertEqual(Choice.objects.count(), 1)
+        archived = ArchivedQuestion.objects.get(pk=self.old.pk)
+        self.assertEqual(
+            [(choice.choice_text, choice.votes)
+             for choice in archived.choice_set.order_by('pk')],
+            [("Choice 1.", 3), ("Choice 2.", 1)])
+        response = self.client.get(reverse('polls:index'))
+        self.assertNotContains(response, "Old question.")
+        response = self.client.get(reverse('polls:detail',
+                                           args=(self.old.id,)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_archived_results_are_shown(self):
+        """
+        The results page of an archived question is still shown, without
+        the link to vote again.
+        """
+        url = reverse('polls:results', args=(self.old.id,))
+        self.client.get(url)
+        archive.archive()
+        response = self.client.get(url)
+        self.assertContains(response, "Choice 1. -- 3 votes")
+        self.assertNotContains(response, "Vote again?")
+
+
+class BackupTests(TransactionTestCase):
+    def setUp(self):
+        self.question = create_question_with_choice(
+            "Question 1.", days=-1, choice_text="Choice 1.", votes=2)
+        backup_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, backup_dir)
+        self.path = os.path.join(backup_dir, 'backup.sqlite3.gz')
+
+    def test_backup_and_restore(self):
+        """
+        A backup, taken in several steps, passes the integrity check and
+        brings deleted rows back when restored.
+        """
+        steps = []
+        backup.backup(self.path, pages=1,
+                      progress=lambda *args: steps.append(args))
+        self.assertGreater(len(steps), 1)
+        self.assertEqual(backup.verify(self.path), [])
+        Question.objects.all().delete()
+        backup.restore(self.path)
+        self.assertEqual(Choice.objects.get(question=self.question).votes, 2)
+
+    def test_restore_db_invalidates_shared_cache(self):
+        """
+        Processes sharing the cache with restore_db stop serving the
+        replaced contents.
+        """
+        caches = use_shared_cache(self)
+        backup.backup(self.path)
+        Choice.objects.update(votes=5)
+        caching.bump_version(self.question.pk)
+        question = objectcache.get_question(self.question.pk)
+        self.assertEqual(question.choice_set.all()[0].votes, 5)
+        with self.settings(CACHES=caches):
+            call_command('restore_db', self.path, stdout=io.StringIO())
+        question = objectcache.get_question(self.question.pk)
+        self.assertEqual(question.choice_set.all()[0].votes, 2)
+
+    def test_restore_db_warns_about_private_cache(self):
+        """
+        With a cache private to each process, restore_db says to restart
+        the web workers.
+        """
+        backup.backup(self.path)
+        stderr = io.StringIO()
+        with self.settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            call_command('restore_db', self.path,
+                         stdout=io.StringIO(), stderr=stderr)
+        self.assertIn('restart the web workers', stderr.getvalue())
+
+    def test_corrupt_backup_fails_verification(self):
+        """
+        verify() reports a file that isn't a sound database.
+        """
+        with open(self.path, 'wb') as f:
+            f.write(b'not a database')
+        self.assertNotEqual(backup.verify(self.path), [])
+
+
+class ResultsEngineTests(PollsTestCase):
+    def test_compute(self):
+        """
+        Shares, shared ranks for ties, Wilson intervals and leaders.
+        """
+        stats = results._compute_python([3, 1, 3, 0], top=3)
+        self.assertEqual(stats['total'], 7)
+        self.assertAlmostEqual(stats['percent'][0], 300 / 7.0)
+        self.assertEqual(stats['rank'], [1, 3, 1, 4])
+        self.assertEqual(stats['top'], [0, 2, 1])
+        # Wilson score interval of 3 out of 7.
+        self.assertAlmostEqual(stats['low'][0], 15.82, places=2)
+        self.assertAlmostEqual(stats['high'][0], 74.95, places=2)
+        self.assertAlmostEqual(stats['low'][3], 0)
+        self.assertGreater(stats['high'][3], 0)
+
+    def test_no_votes(self):
+        """
+        Without votes every choice has no share and they all tie.
+        """
+        stats = results._compute_python([0, 0], top=10)
+        self.assertEqual(stats['percent'], [0, 0])
+        self.assertEqual(stats['rank'], [1, 1])
+
+    @unittest.skipIf(results.numpy is None, "NumPy is not installed")
+    def test_numpy_matches_python(self):
+        """
+        Both implementations give the same results.
+        """
+        votes = [(i * 7919) % 101 for i in range(500)] + [0, 0]
+        expected = results._compute_python(votes, top=20)
+        stats = results._compute_numpy(votes, top=20)
+        self.assertEqual(stats['rank'], expected['rank'])
+        self.assertEqual(stats['top'], expected['top'])
+        for key in ('percent', 'low', 'high'):
+            for value, expected_value in zip(stats[key], expected[key]):
+                self.assertAlmostEqual(value, expected_value)
+
+    def test_results_page_and_json(self):
+        """
+        The results page and its JSON version show the statistics.
+        """
+        question, = create_questions(
+            ("Question 1.", -1, [("Choice 1.", 1), ("Choice 2.", 3)]))
+        response = self.client.get(reverse('polls:results',
+                                           args=(question.id,)))
+        self.assertContains(response, "#1, 75.0%")
+        response = self.client.get(reverse('polls:results_json',
+                                           args=(question.id,)))
+        data = response.json()
+        self.assertEqual(data['total'], 4)
+        self.assertEqual([choice['rank'] for choice in data['choices']],
+                         [2, 1])
+        self.assertEqual(data['top'], [data['choices'][1]['id'],
+                                       data['choices'][0]['id']])
+
+
+class LeanMiddlewareTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.question, = create_questions(
+            ("Question 1.", -1, [("Choice 1.", 0)]))
+        cls.url = reverse('polls:detail', args=(cls.question.id,))
+
+    def test_anonymous_read_skips_session(self):
+        """
+        An anonymous visitor reading a poll gets no session, user lookup
+        or message storage.
+        """
+        response = self.client.get(self.url)
+        request = response.wsgi_request
+        self.assertIs(request.session._wrapped, empty)
+        self.assertIs(request.user.is_anonymous, True)
+        self.assertFalse(hasattr(request, '_messages'))
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_session_cookie_uses_full_stack(self):
+        """
+        Visitors with a session, and posts, go through the stock
+        middleware.
+        """
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'x' * 32
+        request = self.client.get(self.url).wsgi_request
+        self.assertTrue(hasattr(request, '_messages'))
+        self.client.cookies.clear()
+        request = self.client.post(reverse('polls:vote',
+                                           args=(self.question.id,))
+                                   ).wsgi_request
+        self.assertTrue(hasattr(request, '_messages'))
+
+    def test_conditional_get_and_gzip(self):
+        """
+        Pages are compressed for clients accepting gzip, and unchanged
+        pages are answered with 304 Not Modified.
+        """
+        url = reverse('polls:index')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'],
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 304)
+
+    def test_profile_times_middleware_once_and_restores_it(self):
+        """
+        A profiled hook calling the profiled hook of its base class is
+        timed once, and the classes are unchanged afterwards.
+        """
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'x' * 32
+        with profiling.profile(middleware=[LeanSessionMiddleware,
+                                           SessionMiddleware]) as timings:
+            self.client.get(self.url)
+        self.assertIn('middleware LeanSessionMiddleware', timings)
+        self.assertNotIn('middleware SessionMiddleware', timings)
+        for cls in (LeanSessionMiddleware, SessionMiddleware):
+            for hook in ('process_request', 'process_response'):
+                self.assertFalse(hasattr(getattr(cls, hook), 'profiled'))
+        self.assertNotIn('process_view', LeanSessionMiddleware.__dict__)
+
+
+class WarmupTests(PollsTestCase):
+    # warm_up() connects to every database.
+    multi_db = True
+
+    def test_warm_up(self):
+        """
+        The warm-up requests pages through the WSGI application.
+        """
+        create_question_with_choice("Question 1.", days=-1,
+                                    choice_text="Choice 1.")
+        # Like the test client, keep the test's database connection open.
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+        application = get_wsgi_application()
+        url = reverse('polls:index')
+        with self.settings(POLLS_WARMUP_URLS=[url]):
+            self.assertGreater(warmup.warm_up(application), 0)
+        self.assertEqual(warmup.request(application, url), '200 OK')
+
+    def test_failed_warm_up_request_is_logged(self):
+        """
+        Warm-up requests that don't succeed are logged.
+        """
+        with self.settings(POLLS_WARMUP_URLS=['/polls/missing/']), \
+                self.assertLogs('polls.warmup', 'WARNING') as logs:
+            warmup.warm_requests(get_wsgi_application())
+        self.assertIn('/polls/missing/ returned 404', logs.output[0])
@@ -7,5 +7,8 @@ urlpatterns = [
     url(r'^$', views.IndexView.as_view(), name='index'),
     url(r'^(?P<pk>[0-9]+)/$', views.DetailView.as_view(), name='detail'),
     url(r'^(?P<pk>[0-9]+)/results/$', views.ResultsView.as_view(), name='results'),
+    url(r'^(?P<pk>[0-9]+)/results\.json$', views.ResultsJSONView.as_view(),
+        name='results_json'),
     url(r'^(?P<question_id>[0-9]+)/vote/$', views.vote, name='vote'),
+    url(r'^cache-stats/$', views.cache_stats, name='cache_stats'),
 ]
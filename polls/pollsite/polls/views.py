@@ -1,9 +1,14 @@
-from django.shortcuts import get_object_or_404, render
-from django.http import HttpResponseRedirect
+from operator import attrgetter
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render
+from django.http import Http404, HttpResponseRedirect, JsonResponse
 from django.urls import reverse
-from django.utils import timezone
 from django.views import generic
 
+from . import history, objectcache, results, sharding, votequeue
+from .ratelimit import limit_votes
 from .models import Choice, Question
 
 class IndexView(generic.ListView):
@@ -15,37 +20,79 @@ class IndexView(generic.ListView):
         Return the last five published questions (not including those set to be
         published in the future).
         """
-        return Question.objects.filter(
+        latest = Question.objects.filter(
             choice__isnull=False).filter(
-            pub_date__lte=timezone.now()
-        ).distinct().order_by('-pub_date')[:5]
+            published=True
+        ).distinct().order_by('-pub_date')
+        if len(sharding.shards()) == 1:
+            return latest[:5]
+        # Merge the last five of every shard.
+        questions = [question for queryset in sharding.each_shard(latest)
+                     for question in queryset[:5]]
+        return sorted(questions, key=attrgetter('pub_date'), reverse=True)[:5]
 
 
-class DetailView(generic.DetailView):
-    model = Question
-    template_name = 'polls/detail.html'
+class CachedQuestionMixin(object):
+    """
+    Looks the question up in the object cache instead of the database.
+    """
 
-    def get_queryset(self):
+    def get_object(self, queryset=None):
         """
-        Excludes any questions that aren't published yet.
+        Excludes any questions that aren't published yet, or have no
+        choices.
         """
-        return Question.objects.filter(pub_date__lte=timezone.now()).filter(
-            choice__isnull=False).distinct()
+        question = objectcache.get_question(self.kwargs['pk'])
+        if (question is None or not question.published or
+                not question.choice_set.all()):
+            raise Http404("No question found matching the query")
+        return question
+
+
+class DetailView(CachedQuestionMixin, generic.DetailView):
+    model = Question
+    template_name = 'polls/detail.html'
 
 
-class ResultsView(generic.DetailView):
+class ResultsView(CachedQuestionMixin, generic.DetailView):
     model = Question
     template_name = 'polls/results.html'
+    context_object_name = 'question'
 
-    def get_queryset(self):
+    def get_object(self, queryset=None):
         """
-        Excludes any questions that aren't published yet from the results too.
+        Falls back to the archive for old questions.
         """
-        return Question.objects.filter(pub_date__lte=timezone.now()).filter(
-            choice__isnull=False).distinct()
+        try:
+            return super(ResultsView, self).get_object(queryset)
+        except Http404:
+            question = objectcache.get_archived_question(self.kwargs['pk'])
+            if question is None:
+                raise
+            return question
+
+    def get_context_data(self, **kwargs):
+        context = super(ResultsView, self).get_context_data(**kwargs)
+        context['results'] = results.question_results(self.object)
+        return context
+
+
+class ResultsJSONView(ResultsView):
+    """
+    The results with their statistics, as JSON.
+    """
 
+    def render_to_response(self, context, **response_kwargs):
+        return JsonResponse(context['results'])
+
+@limit_votes
 def vote(request, question_id):
-    question = get_object_or_404(Question, pk=question_id)
+    question = objectcache.get_question(question_id)
+    if question is None:
+        raise Http404("No question found matching the query")
+    if question.closed:
+        # The detail page tells the user that the poll is closed.
+        return render(request, 'polls/detail.html', {'question': question})
     try:
         selected_choice = question.choice_set.get(pk=request.POST['choice'])
     except (KeyError, Choice.DoesNotExist):
@@ -54,9 +101,22 @@ def vote(request, question_id):
             'error_message': "You didn't select a choice.",
         })
     else:
-        selected_choice.votes += 1
-        selected_choice.save()
+        if settings.POLLS_ASYNC_VOTES:
+            # Counted by the 'vote_worker' command.
+            votequeue.enqueue(selected_choice)
+        else:
+            selected_choice.votes += 1
+            selected_choice.save()
+            history.record_vote(selected_choice)
         # Always return an HttpResponseRedirect after successfully dealing
         # with a POST data. This prevents data from being posted twice if a
         # user hits the Back button.
         return HttpResponseRedirect(reverse('polls:results', args=(question.id,)))
+
+
+@staff_member_required
+def cache_stats(request):
+    """
+    Hit rate of the question cache of the process serving the request.
+    """
+    return JsonResponse(objectcache.stats())
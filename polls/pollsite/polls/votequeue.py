@@ -0,0 +1,171 @@
+"""
+Durable local queue of votes, applied to the database by a separate worker.
+
+With POLLS_ASYNC_VOTES on, vote() only appends the vote to an SQLite file
+(POLLS_VOTE_QUEUE_PATH) and redirects at once. The 'vote_worker' command
+drains the queue in batches and applies one aggregated increment per choice.
+
+Delivery is at least once: a batch is removed from the queue only after it
+has been applied, and the id of the last applied vote is committed together
+with the increments (VoteQueueCheckpoint, one per shard), so a batch applied
+just before a crash is skipped instead of being counted twice. Vote ids
+start over when the queue file is replaced, so the checkpoint also records
+which queue file it belongs to.
+"""
+import datetime
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import caching, history, sharding
+from .models import Choice, VoteBucket, VoteQueueCheckpoint
+
+_local = threading.local()
+
+
+def _connection():
+    """
+    Return this thread's connection to the queue, creating the queue file
+    if needed.
+    """
+    path = settings.POLLS_VOTE_QUEUE_PATH
+    connection = getattr(_local, 'connection', None)
+    if connection is None or _local.path != path:
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        # Readers (the worker) don't block writers (requests) with WAL.
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS vote ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'question_id INTEGER NOT NULL, '
+            'choice_id INTEGER NOT NULL, '
+            'enqueued_at REAL NOT NULL)')
+        # Identifies this queue file, whose vote ids start over from 1.
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS queue ('
+            'singleton INTEGER PRIMARY KEY CHECK (singleton = 1), '
+            'id TEXT NOT NULL)')
+        connection.execute(
+            'INSERT OR IGNORE INTO queue (singleton, id) VALUES (1, ?)',
+            (uuid.uuid4().hex,))
+        _local.queue_id, = connection.execute(
+            'SELECT id FROM queue').fetchone()
+        _local.connection = connection
+        _local.path = path
+    return connection
+
+
+def close():
+    """
+    Close this thread's connection to the queue, if it has one.
+    """
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        connection.close()
+
+
+@receiver(setting_changed)
+def reset(**kwargs):
+    if kwargs['setting'] == 'POLLS_VOTE_QUEUE_PATH':
+        close()
+
+
+def enqueue(choice):
+    """
+    Append a vote for 'choice' to the queue.
+    """
+    _connection().execute(
+        'INSERT INTO vote (question_id, choice_id, enqueued_at) '
+        'VALUES (?, ?, ?)', (choice.question_id, choice.pk, time.time()))
+
+
+def queue_id():
+    """
+    Return the id of the queue file.
+    """
+    _connection()
+    return _local.queue_id
+
+
+def lag():
+    """
+    Return the number of queued votes and the age in seconds of the oldest
+    one (0 when the queue is empty).
+    """
+    count, oldest = _connection().execute(
+        'SELECT COUNT(*), MIN(enqueued_at) FROM vote').fetchone()
+    return count, time.time() - oldest if oldest is not None else 0
+
+
+def _apply(using, rows, last_id, queue_id):
+    """
+    Apply the queued votes in 'rows' of the queue 'queue_id' to the shard
+    'using', unless an earlier attempt did or their choice was deleted, and
+    return the ones applied.
+    """
+    with transaction.atomic(using=using):
+        checkpoint, _ = VoteQueueCheckpoint.objects.using(
+            using).select_for_update().get_or_create(pk=1)
+        if checkpoint.queue_id != queue_id:
+            # The checkpoint is of a queue file since replaced.
+            checkpoint.last_id = 0
+        rows = [row for row in rows if row[0] > checkpoint.last_id]
+        # Votes for choices deleted since are dropped, like the votes the
+        # choices had: the foreign keys of their history would fail at
+        # commit, and the batch with them on every retry.
+        existing = set(Choice.objects.using(using).select_for_update().filter(
+            pk__in=set(row[2] for row in rows)).values_list('pk', flat=True))
+        rows = [row for row in rows if row[2] in existing]
+        votes = Counter((question_id, choice_id)
+                        for id, question_id, choice_id, enqueued_at in rows)
+        buckets = Counter(
+            (question_id, choice_id, history.bucket_start(
+                datetime.datetime.fromtimestamp(enqueued_at, timezone.utc),
+                VoteBucket.MINUTE))
+            for id, question_id, choice_id, enqueued_at in rows)
+        for (question_id, choice_id), count in votes.items():
+            Choice.objects.using(using).filter(pk=choice_id).update(
+                votes=F('votes') + count)
+        for (question_id, choice_id, start), count in buckets.items():
+            history.record_vote(Choice(pk=choice_id, question_id=question_id),
+                                votes=count, when=start)
+        checkpoint.last_id = last_id
+        checkpoint.queue_id = queue_id
+        checkpoint.save(using=using)
+    return rows
+
+
+def process_batch(batch_size=1000):
+    """
+    Apply up to 'batch_size' queued votes and remove them from the queue.
+    Return the number of votes applied.
+    """
+    connection = _connection()
+    rows = connection.execute(
+        'SELECT id, question_id, choice_id, enqueued_at FROM vote '
+        'ORDER BY id LIMIT ?', (batch_size,)).fetchall()
+    if not rows:
+        return 0
+    last_id = rows[-1][0]
+    # Every shard commits its votes with its own checkpoint.
+    by_shard = {}
+    for row in rows:
+        by_shard.setdefault(sharding.shard_for(row[1]), []).append(row)
+    applied = []
+    for using, shard_rows in by_shard.items():
+        applied.extend(_apply(using, shard_rows, last_id, queue_id()))
+    # update() sends no post_save signal, so invalidate cached data here.
+    for question_id in set(row[1] for row in applied):
+        caching.bump_version(question_id)
+    connection.execute('DELETE FROM vote WHERE id <= ?', (last_id,))
+    return len(applied)
@@ -0,0 +1,152 @@
+"""
+Warm-up of new worker processes.
+
+A fresh process imports the views, compiles the URL patterns and templates
+and connects to the databases on its first requests, which are therefore
+much slower than the following ones. warm_up() does that work before the
+process accepts traffic: pollsite/wsgi.py calls it when POLLS_WARMUP is on
+(by default only with DEBUG off, so that runserver doesn't warm up on
+every reload).
+
+With a server that loads the application once and then forks its workers
+(gunicorn --preload, uWSGI without lazy-apps), the warm-up runs once in the
+master process and every worker starts warm. Database connections must not
+be shared between processes, so they are closed before every fork (see
+close_connections_before_fork()).
+"""
+import io
+import logging
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+from . import votequeue
+
+logger = logging.getLogger(__name__)
+
+def warm_urls():
+    """
+    Import the URL configurations and views, and compile every URL
+    pattern.
+    """
+    resolver = get_resolver()
+    # Building the reverse lookup tables compiles the patterns, but only
+    # those of the included URL configurations without a namespace.
+    resolver.reverse_dict
+    for prefix, namespace_resolver in resolver.namespace_dict.values():
+        namespace_resolver.reverse_dict
+
+
+def warm_templates():
+    """
+    Compile the templates in POLLS_WARMUP_TEMPLATES (only kept when the
+    cached template loader is used, as it is with DEBUG off).
+    """
+    for name in getattr(settings, 'POLLS_WARMUP_TEMPLATES', []):
+        try:
+            get_template(name)
+        except TemplateDoesNotExist:
+            pass
+
+
+def warm_connections():
+    """
+    Connect to every database and cache.
+    """
+    for alias in connections:
+        connections[alias].ensure_connection()
+    for alias in settings.CACHES:
+        caches[alias].get('polls:warmup')
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def request(application, url):
+    """
+    Send a GET request for 'url' through the WSGI 'application' and return
+    the response status.
+    """
+    host = _host()
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': url,
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': host,
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+    statuses = []
+    response = application(environ,
+                           lambda status, headers: statuses.append(status))
+    try:
+        for chunk in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return statuses[0]
+
+
+def warm_requests(application):
+    """
+    Request every URL in POLLS_WARMUP_URLS through the WSGI 'application',
+    which also sets up the middleware and fills the caches. Responses
+    other than 2xx are logged, as they warm up less than intended.
+    """
+    for url in getattr(settings, 'POLLS_WARMUP_URLS', []):
+        status = request(application, url)
+        if not status.startswith('2'):
+            logger.warning('Warm-up request for %s returned %s.', url, status)
+
+
+def warm_up(application=None):
+    """
+    Prepare this process for its first requests and return the time it
+    took in seconds.
+    """
+    start = time.perf_counter()
+    warm_urls()
+    warm_templates()
+    warm_connections()
+    if application is not None:
+        warm_requests(application)
+    return time.perf_counter() - start
+
+
+def close_connections():
+    """
+    Close the connections this process holds to databases and to the
+    vote queue.
+    """
+    for alias in connections:
+        connections[alias].close()
+    votequeue.close()
+
+
+_fork_hook_installed = False
+
+
+def close_connections_before_fork():
+    """
+    Close the connections before this process forks, so that workers
+    forked from a warmed up master open their own.
+    """
+    global _fork_hook_installed
+    # os.register_at_fork() is only available from Python 3.7.
+    if not _fork_hook_installed and hasattr(os, 'register_at_fork'):
+        os.register_at_fork(before=close_connections)
+        _fork_hook_installed = True
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/1.11/ref/settings/
 """
 
+import datetime
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -42,11 +43,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
+    'polls.middleware.LeanSessionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'polls.middleware.LeanAuthenticationMiddleware',
+    'polls.middleware.LeanMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -82,6 +85,25 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/1.11/topics/cache/
+
+# Every process (web workers, 'vote_worker', 'publish_questions', ...)
+# must see the question versions the others bump (see polls/caching.py),
+# so the cache is shared between them: a per-process LocMemCache would keep
+# serving stale pages. Use memcached or Redis when they run on several
+# hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
 
@@ -119,3 +141,76 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/1.11/howto/static-files/
 
 STATIC_URL = '/static/'
+
+STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+
+# 'collectstatic' fingerprints, minifies and pre-compresses the files for
+# production, where they can be served with far-future cache headers.
+if not DEBUG:
+    STATICFILES_STORAGE = 'polls.storage.CompressedManifestStaticFilesStorage'
+
+
+# Polls
+
+# Minute vote buckets older than this are rolled up into hourly buckets by
+# the 'rollup_votes' command. Hourly buckets are kept forever unless
+# POLLS_VOTE_HISTORY_HOUR_RETENTION is set.
+POLLS_VOTE_HISTORY_MINUTE_RETENTION = datetime.timedelta(days=1)
+POLLS_VOTE_HISTORY_HOUR_RETENTION = None
+
+# Votes are rate limited per client and question with a token bucket of
+# POLLS_VOTE_BURST tokens refilled at POLLS_VOTE_RATE tokens per second.
+# The local backend keeps buckets per process; use
+# 'polls.ratelimit.CacheBackend' to share them through POLLS_RATELIMIT_CACHE.
+POLLS_VOTE_RATE = 1.0
+POLLS_VOTE_BURST = 10
+POLLS_RATELIMIT_BACKEND = 'polls.ratelimit.LocalBackend'
+POLLS_RATELIMIT_MAX_KEYS = 10000
+POLLS_RATELIMIT_CACHE = 'default'
+POLLS_RATELIMIT_CLIENT_KEY = 'REMOTE_ADDR'
+
+# Rendered results pages of closed polls (see polls/snapshots.py for how to
+# serve them from the front-end server).
+POLLS_SNAPSHOT_ROOT = os.path.join(BASE_DIR, 'snapshots')
+
+# With POLLS_ASYNC_VOTES on, votes are appended to the queue file at
+# POLLS_VOTE_QUEUE_PATH and counted by the 'vote_worker' command.
+POLLS_ASYNC_VOTES = False
+POLLS_VOTE_QUEUE_PATH = os.path.join(BASE_DIR, 'votequeue.sqlite3')
+
+# Questions and their choices are cached by primary key, in a per-process
+# LRU of POLLS_OBJECT_CACHE_SIZE entries kept for at most
+# POLLS_OBJECT_CACHE_LOCAL_TIMEOUT seconds, in front of the default cache.
+POLLS_OBJECT_CACHE_SIZE = 1000
+POLLS_OBJECT_CACHE_LOCAL_TIMEOUT = 5
+POLLS_OBJECT_CACHE_TIMEOUT = 300
+
+# Number of leading choices listed in the results statistics (see
+# polls/results.py).
+POLLS_RESULTS_TOP = 10
+
+# Questions are spread by id over the databases in POLLS_SHARDS (see
+# polls/sharding.py). Run 'rebalance_shards' after changing the list.
+POLLS_SHARDS = ['default']
+DATABASE_ROUTERS = ['polls.sharding.ShardRouter']
+
+# Questions published longer than this ago are moved to the archive tables
+# by the 'archive_questions' command; only their results page is kept.
+POLLS_ARCHIVE_AFTER = datetime.timedelta(days=365)
+
+# Anonymous GET requests under these paths skip the session, authentication
+# and message middleware (see polls/middleware.py).
+POLLS_LEAN_PATHS = ['/polls/']
+
+# pollsite/wsgi.py prepares new processes before they accept traffic (see
+# polls/warmup.py): it compiles URL patterns and these templates, connects
+# to the databases and caches, and requests these URLs. Off with DEBUG on,
+# as runserver loads the application again on every reload.
+POLLS_WARMUP = not DEBUG
+POLLS_WARMUP_TEMPLATES = [
+    'polls/index.html',
+    'polls/home.html',
+    'polls/detail.html',
+    'polls/results.html',
+]
+POLLS_WARMUP_URLS = ['/polls/']
@@ -0,0 +1,50 @@
+"""
+Django settings for running the pollsite test suite.
+
+The test database is created in memory straight from the models instead of
+by running every migration, and passwords are hashed with a fast hasher.
+Tests can run in parallel, one process per core:
+
+    django-admin test --settings=pollsite.test_settings --parallel
+"""
+
+from .settings import *
+
+
+class DisableMigrations(object):
+    """
+    Make every app look unmigrated, so that its tables are created
+    directly from its current models.
+    """
+
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        return None
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    # Only used by the tests that spread questions over two shards.
+    'shard1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
+MIGRATION_MODULES = DisableMigrations()
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pollsite-tests',
+    }
+}
@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/1.11/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pollsite.settings")
 
 application = get_wsgi_application()
+
+if settings.POLLS_WARMUP:
+    from polls import warmup
+
+    # Be ready for the first request, and let servers that fork their
+    # workers after loading the application (gunicorn --preload) warm up
+    # once for all of them.
+    warmup.warm_up(application)
+    warmup.close_connections_before_fork()
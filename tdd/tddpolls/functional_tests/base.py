@@ -0,0 +1,25 @@
+from django.contrib.staticfiles.testing import StaticLiveServerTestCase
+
+from .browser import make_browser
+
+
+class FunctionalTest(StaticLiveServerTestCase):
+    """
+    Runs against a live server started for the test class, with one browser
+    shared by all tests of the class. Test classes can be spread over worker
+    processes with the test runner's --parallel option.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super(FunctionalTest, cls).setUpClass()
+        cls.browser = make_browser()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.browser.quit()
+        super(FunctionalTest, cls).tearDownClass()
+
+    def setUp(self):
+        # Every test starts as a new visitor.
+        self.browser.delete_all_cookies()
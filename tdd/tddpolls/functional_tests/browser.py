@@ -0,0 +1,206 @@
+"""
+Browsers for the functional tests.
+
+By default the tests drive HTTPBrowser, which fetches pages over HTTP and
+parses them without a display, JavaScript or a browser process, so it runs
+anywhere. Set FUNCTIONAL_TEST_BROWSER=firefox to drive a headless Firefox
+through Selenium instead. Both offer the same small part of the Selenium
+WebDriver API that the tests use.
+"""
+import os
+import re
+from html.parser import HTMLParser
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.request import HTTPCookieProcessor, build_opener
+
+try:
+    from selenium.common.exceptions import NoSuchElementException
+except ImportError:
+    class NoSuchElementException(Exception):
+        pass
+
+# Elements that never have a closing tag.
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+
+
+def make_browser():
+    """
+    Start the browser selected by the FUNCTIONAL_TEST_BROWSER environment
+    variable ('http', the default, or 'firefox').
+    """
+    name = os.environ.get('FUNCTIONAL_TEST_BROWSER', 'http')
+    if name == 'http':
+        return HTTPBrowser()
+    if name == 'firefox':
+        from selenium import webdriver
+        options = webdriver.FirefoxOptions()
+        options.add_argument('-headless')
+        return webdriver.Firefox(options=options)
+    raise ValueError('Unknown FUNCTIONAL_TEST_BROWSER %r.' % name)
+
+
+def Select(element):
+    """
+    Wrap a <select> element of either browser.
+    """
+    if isinstance(element, Element):
+        return HTTPSelect(element)
+    from selenium.webdriver.support.ui import Select
+    return Select(element)
+
+
+class Element(object):
+    def __init__(self, tag, attrs, parent=None):
+        self.tag_name = tag
+        self.attrs = dict(attrs)
+        self.parent = parent
+        self.children = []
+        self.texts = []
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+    @property
+    def text(self):
+        """
+        The text of the element and its descendants, with whitespace
+        collapsed like a browser renders it.
+        """
+        return re.sub(r'\s+', ' ', ''.join(self._texts())).strip()
+
+    def _texts(self):
+        for item in self.texts:
+            if isinstance(item, Element):
+                for text in item._texts():
+                    yield text
+            else:
+                yield item
+
+    def iter(self):
+        for child in self.children:
+            yield child
+            for descendant in child.iter():
+                yield descendant
+
+    def matches(self, selector):
+        """
+        Match a simple 'tag', '.class', 'tag.class' or '#id' selector.
+        """
+        match = re.match(r'^([\w-]*)(?:\.([\w-]+)|#([\w-]+))?$', selector)
+        if match is None:
+            raise ValueError('Unsupported selector %r.' % selector)
+        tag, class_name, element_id = match.groups()
+        return ((not tag or self.tag_name == tag) and
+                (not class_name or
+                 class_name in self.attrs.get('class', '').split()) and
+                (not element_id or self.attrs.get('id') == element_id))
+
+    def find_elements_by_css_selector(self, selector):
+        return [element for element in self.iter()
+                if element.matches(selector)]
+
+    def find_element_by_css_selector(self, selector):
+        elements = self.find_elements_by_css_selector(selector)
+        if not elements:
+            raise NoSuchElementException(
+                'Unable to locate element: %s' % selector)
+        return elements[0]
+
+    def find_elements_by_tag_name(self, name):
+        return self.find_elements_by_css_selector(name)
+
+    def find_element_by_tag_name(self, name):
+        return self.find_element_by_css_selector(name)
+
+    def find_element_by_id(self, element_id):
+        return self.find_element_by_css_selector('#' + element_id)
+
+    def find_element_by_name(self, name):
+        for element in self.iter():
+            if element.attrs.get('name') == name:
+                return element
+        raise NoSuchElementException('Unable to locate element: [name="%s"]'
+                                     % name)
+
+
+class DocumentParser(HTMLParser):
+    def __init__(self):
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self.document = self.current = Element('#document', {})
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, attrs, self.current)
+        self.current.children.append(element)
+        self.current.texts.append(element)
+        if tag not in VOID_ELEMENTS:
+            self.current = element
+
+    def handle_endtag(self, tag):
+        # Close up to the matching open element, forgiving unclosed tags.
+        element = self.current
+        while element is not None and element.tag_name != tag:
+            element = element.parent
+        if element is not None and element.parent is not None:
+            self.current = element.parent
+
+    def handle_data(self, data):
+        self.current.texts.append(data)
+
+
+class HTTPBrowser(object):
+    """
+    A browser without JavaScript that keeps cookies between requests.
+    """
+
+    def __init__(self):
+        self.delete_all_cookies()
+        self.document = Element('#document', {})
+
+    def delete_all_cookies(self):
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+
+    def get(self, url):
+        try:
+            response = self.opener.open(url)
+        except HTTPError as e:
+            # Error pages are shown like any other page.
+            response = e
+        charset = response.headers.get_content_charset() or 'utf-8'
+        parser = DocumentParser()
+        parser.feed(response.read().decode(charset))
+        parser.close()
+        self.document = parser.document
+        self.current_url = response.geturl()
+
+    @property
+    def title(self):
+        titles = self.document.find_elements_by_tag_name('title')
+        return titles[0].text if titles else ''
+
+    def __getattr__(self, name):
+        # find_element(s)_by_* search the whole document.
+        if name.startswith('find_element'):
+            return getattr(self.document, name)
+        raise AttributeError(name)
+
+    def quit(self):
+        self.cookies.clear()
+
+
+class HTTPSelect(object):
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def options(self):
+        return self.element.find_elements_by_tag_name('option')
+
+    def select_by_visible_text(self, text):
+        for option in self.options:
+            if option.text == text:
+                option.attrs['selected'] = 'selected'
+            else:
+                option.attrs.pop('selected', None)
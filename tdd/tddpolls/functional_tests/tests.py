@@ -1,20 +1,13 @@
-from selenium import webdriver
-from selenium.webdriver.support.ui import Select
-import unittest
+from .base import FunctionalTest
+from .browser import Select
 
-class NewAnonymousVisitorBlankSiteTest(unittest.TestCase):
-
-    def setUp(self):
-        self.browser = webdriver.Firefox()
-
-    def tearDown(self):
-        self.browser.quit()
+class NewAnonymousVisitorBlankSiteTest(FunctionalTest):
 
     def test_new_anonymous_visitor_sees_no_items(self):
         #Edith comes the TDD Polls site
         #She knew that she's in the right place beacause she sees
         #the title.
-        self.browser.get('http://localhost:8000')
+        self.browser.get(self.live_server_url)
         self.assertIn('TDD Polls', self.browser.title)
 
         #The header says it so.
@@ -26,20 +19,16 @@ class NewAnonymousVisitorBlankSiteTest(unittest.TestCase):
         self.assertIn('No polls created yet.', no_elem_text)
 
         #She cannot do anything so she quits.
-        self.browser.quit()
 
-class NewAnonymousVisitorTest(unittest.TestCase):
+class NewAnonymousVisitorTest(FunctionalTest):
 
     def setUp(self):
-        self.browser = webdriver.Firefox()
+        super(NewAnonymousVisitorTest, self).setUp()
         #create some items here!
 
-    def tearDown(self):
-        self.browser.quit()
-
     def test_new_visitor_sees_polls_and_can_vote(self):
         #Edith once again tries the site.
-        self.browser.get('http://localhost:8000')
+        self.browser.get(self.live_server_url)
         #She sees the title of the newest polls in the main page
         #and below the time when the poll was created.
         poll_titles = self.browser.find_elements_by_css_selector('h3.poll-title')
@@ -101,7 +90,3 @@ class NewAnonymousVisitorTest(unittest.TestCase):
 
 #         #Satisfied she quites the page and goes offline.
 
-
-
-if __name__ == '__main__':
-    unittest.main(warnings='ignore')
@@ -1,11 +1,15 @@
 from django.urls import resolve
 from django.test import TestCase
 from django.http import HttpRequest
+from django.core.cache import cache
 
 from polls.views import main_page
 
 class MainPageTest(TestCase):
 
+    def setUp(self):
+        cache.clear()
+
     def test_root_url_resolves_to_main_page(self):
         main = resolve('/')
         self.assertEqual(main.func, main_page)
@@ -13,3 +17,20 @@ class MainPageTest(TestCase):
     def test_main_page_returns_correct_HTML(self):
         response = self.client.get('/')
         self.assertTemplateUsed(response, 'home.html')
+
+    def test_repeat_requests_skip_template_rendering(self):
+        first = self.client.get('/')
+        second = self.client.get('/')
+        self.assertTemplateNotUsed(second, 'home.html')
+        self.assertEqual(second.content, first.content)
+
+    def test_main_page_can_be_cached_by_browsers(self):
+        response = self.client.get('/')
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertTrue(response['ETag'])
+
+    def test_unchanged_main_page_returns_304(self):
+        etag = self.client.get('/')['ETag']
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
@@ -1,5 +1,34 @@
-from django.shortcuts import render
-from django.shortcuts import render
+import hashlib
+from functools import lru_cache
 
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import get_template
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+MAIN_PAGE_TEMPLATE = 'home.html'
+
+
+@lru_cache()
+def main_page_etag():
+    """
+    Hash of the main page template. It only changes when a deploy changes
+    the template, which then gets a new cache key and ETag.
+    """
+    template = get_template(MAIN_PAGE_TEMPLATE)
+    return hashlib.md5(template.template.source.encode('utf-8')).hexdigest()
+
+
+@cache_control(public=True, max_age=settings.MAIN_PAGE_MAX_AGE)
+@condition(etag_func=lambda request: main_page_etag())
 def main_page(request):
-    return render(request, 'home.html')
+    # The page is the same for every visitor, so it is rendered once and
+    # served from the cache afterwards.
+    key = 'tddpolls:main_page:%s' % main_page_etag()
+    content = cache.get(key)
+    if content is None:
+        content = get_template(MAIN_PAGE_TEMPLATE).render()
+        cache.set(key, content, None)
+    return HttpResponse(content)